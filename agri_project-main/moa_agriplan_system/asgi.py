@@ -2,6 +2,8 @@
 ASGI config for moa_agriplan_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn moa_agriplan_system.asgi:application``)
+so that the server-sent activity stream at /api/audit/stream/ stays open.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -2,6 +2,7 @@
 Django settings for moa_agriplan_system project.
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,14 +28,35 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # MUST be first
     'django.middleware.security.SecurityMiddleware',
+    'plans.middleware.CompressionMiddleware',  # Before anything that reads the body
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'plans.middleware.AccessContextMiddleware',  # After authentication
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Response compression (plans.middleware.CompressionMiddleware)
+COMPRESSION_MIN_LENGTH = 1024  # bytes; smaller bodies are sent uncompressed
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Dashboard statistics cache (plans.cache); writes invalidate entries before this
+STATS_CACHE_TIMEOUT = 300  # seconds
+# Longest wait for another request computing the same statistics
+STATS_LOCK_TIMEOUT = 30  # seconds
+# Background threads warming statistics after approvals (plans.warmup)
+STATS_WARMUP_WORKERS = 2
+# Rendered detail responses of approved plans and reports (ApprovedOutputCacheMixin)
+APPROVED_OUTPUT_CACHE_TIMEOUT = 86400  # seconds
+# Cached token users and profiles (plans.authentication); writes invalidate entries before this
+AUTH_TOKEN_CACHE_TIMEOUT = 300  # seconds
+# API tokens expire after this long without use (manage.py purge_tokens deletes them)
+AUTH_TOKEN_TTL = 7 * 24 * 3600  # seconds
+# A used token's validity window is renewed at most this often (one write each time)
+AUTH_TOKEN_RENEW_INTERVAL = 3600  # seconds
+
 # CORS Configuration - SIMPLE AND DIRECT
 CORS_ALLOW_ALL_ORIGINS = True  # Allow all during development
 CORS_ALLOW_CREDENTIALS = True
@@ -96,6 +118,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'moa_agriplan_system.wsgi.application'
+# The activity stream (/api/audit/stream/) only works under the ASGI application;
+# WSGI deployments answer it with 503 and the dashboard keeps polling
+ASGI_APPLICATION = 'moa_agriplan_system.asgi.application'
+# Lifetime of the single-use tickets that open the activity stream; tickets live in
+# the cache, so a multi-worker deployment needs a shared CACHE_BACKEND
+STREAM_TICKET_TIMEOUT = 60  # seconds
 
 # Database
 POSTGRES_CONFIG = {
@@ -127,16 +155,109 @@ else:
         }
     }
 
+# Cache, selected with the CACHE_BACKEND environment variable:
+#   locmem  per-process memory (default); not shared between workers
+#   file    directory at CACHE_LOCATION, shared by the workers on one host
+#   db      cache table in the default database (manage.py createcachetable)
+#   sqlite  cache table in its own SQLite file at CACHE_LOCATION
+#           (manage.py createcachetable --database cache)
+#   redis   Redis or a Redis-compatible server at CACHE_LOCATION (needs redis-py)
+# Hit/miss/eviction counts are served at /api/dashboard/cache_stats/.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'plans.cache_backends.LocMemCache',
+        'LOCATION': 'moa-agriplan',
+    },
+    'file': {
+        'BACKEND': 'plans.cache_backends.FileBasedCache',
+        'LOCATION': CACHE_LOCATION or str(BASE_DIR / '.cache'),
+    },
+    'db': {
+        'BACKEND': 'plans.cache_backends.DatabaseCache',
+        'LOCATION': 'plans_cache',
+    },
+    'sqlite': {
+        'BACKEND': 'plans.cache_backends.DatabaseCache',
+        'LOCATION': 'plans_cache',
+    },
+    'redis': {
+        'BACKEND': 'plans.cache_backends.RedisCache',
+        'LOCATION': CACHE_LOCATION or 'redis://127.0.0.1:6379/1',
+    },
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, not {CACHE_BACKEND!r}")
+
+CACHES = {'default': CACHE_BACKENDS[CACHE_BACKEND]}
+if CACHE_BACKEND != 'redis':
+    # Django's default of 300 entries is too few for per-unit statistics
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': CACHE_MAX_ENTRIES}
+
+if CACHE_BACKEND == 'sqlite':
+    DATABASES['cache'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': CACHE_LOCATION or BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {
+            # Readers do not block the writer, and workers wait for each other's writes
+            # (an immediate transaction takes the write lock up front, so the busy
+            # timeout applies instead of failing the cache's read-then-write)
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+    DATABASE_ROUTERS = ['plans.db_routers.CacheRouter']
+
+# Sessions, selected with the SESSION_BACKEND environment variable:
+#   db              django_session table; every browser request reads it
+#   cached_db       the cache in front of django_session; the table is only read
+#                   on a cache miss and written on changes. Needs a cache shared
+#                   by all workers (CACHE_BACKEND file, sqlite or redis), or a
+#                   logout in one worker is not seen by the others.
+#   signed_cookies  the session lives in a signed cookie; nothing is stored or
+#                   read on the server
+# The default is cached_db with a shared cache and db otherwise. Switching
+# between db and cached_db keeps existing sessions (both use the table);
+# switching to signed_cookies logs browser users out once. Expired rows are
+# removed by manage.py clear_expired_sessions; see bench_sessions for costs.
+SESSION_BACKEND = os.environ.get(
+    'SESSION_BACKEND', 'cached_db' if CACHE_BACKEND in ('file', 'sqlite', 'redis') else 'db'
+)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ValueError(f"SESSION_BACKEND must be one of {', '.join(SESSION_ENGINES)}, not {SESSION_BACKEND!r}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
 # REST Framework - UPDATE THIS
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'plans.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',  # Important for browser
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Change to AllowAny for now
     ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    # orjson-backed JSON; falls back to the stdlib encoder when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': [
+        'plans.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'plans.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Only paginates when ?page= or ?page_size= is given
+    'DEFAULT_PAGINATION_CLASS': 'plans.pagination.EstimatedCountPagination',
 }
 
 # Disable CSRF for API endpoints (DRF handles this with token auth)
@@ -0,0 +1,65 @@
+"""
+Request-scoped access context of the plans app.
+
+Who is asking and which units they can see is resolved once per request
+(plans.middleware.AccessContextMiddleware attaches it as ``request.access``)
+and kept on the user instance, so views and permission helpers share one
+profile lookup. Querysets are restricted by concrete unit ids rather than
+by unit subqueries.
+"""
+from .cache import ALL_UNITS
+from .models import UserProfile
+from .stats import for_units
+
+
+class AccessContext:
+    """Profile, role and accessible unit ids of a user.
+
+    ``unit_ids`` is None for super admins, who can access all units, and a
+    frozenset of ids otherwise (empty without a profile or unit).
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.profile = None
+        if not user.is_anonymous:
+            try:
+                self.profile = user.profile
+            except UserProfile.DoesNotExist:
+                pass
+        self.role = self.profile.role if self.profile else None
+
+        if self.role == 'SUPERADMIN':
+            self.unit_ids = None
+        elif self.profile and self.profile.unit_id:
+            self.unit_ids = frozenset([self.profile.unit_id])
+        else:
+            self.unit_ids = frozenset()
+
+    @property
+    def all_units(self):
+        return self.unit_ids is None
+
+    @property
+    def stats_scope(self):
+        """Cache scope of the accessible units (see plans.cache)."""
+        return ALL_UNITS if self.all_units else self.profile.unit_id
+
+    def can_access_unit(self, unit):
+        """Whether ``unit`` (a unit or its id) is accessible."""
+        if self.profile is None:
+            return False
+        return self.all_units or getattr(unit, 'pk', unit) in self.unit_ids
+
+    def filter_units(self, queryset, field='unit'):
+        """Restrict ``queryset`` to rows whose ``field`` is an accessible unit."""
+        return for_units(queryset, self.unit_ids, field)
+
+
+def get_access_context(user):
+    """Access context of ``user``, resolved once per user instance."""
+    context = getattr(user, '_access_context', None)
+    if context is None:
+        context = AccessContext(user)
+        user._access_context = context
+    return context
@@ -0,0 +1,100 @@
+"""
+Daily audit activity rollups for the plans app.
+
+Activity charts and "actions this month" metrics read from
+AuditActivityRollup instead of scanning WorkflowAudit. The rollup rows are
+maintained by the WorkflowAudit signal handlers in plans.signals.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AuditActivityRollup, WorkflowAudit
+
+
+# Longest window the activity endpoints accept (about ten years)
+MAX_ACTIVITY_DAYS = 3660
+
+
+def _activity_day(audit):
+    """Return the local calendar day an audit row is counted under."""
+    if audit.created_at:
+        return timezone.localdate(audit.created_at)
+    return timezone.localdate()
+
+
+def record_activity(audit, delta=1):
+    """Adjust the rollup bucket of an audit row by ``delta``."""
+    day = _activity_day(audit)
+    bucket = AuditActivityRollup.objects.filter(
+        unit_id=audit.unit_id,
+        action=audit.action,
+        day=day
+    )
+    if bucket.update(count=F('count') + delta) or delta < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            AuditActivityRollup.objects.create(
+                unit_id=audit.unit_id,
+                action=audit.action,
+                day=day,
+                count=delta
+            )
+    except IntegrityError:
+        # Another request created the bucket first
+        bucket.update(count=F('count') + delta)
+
+
+def rebuild_activity_rollups():
+    """Recompute all rollup rows from the raw audit log."""
+    buckets = WorkflowAudit.objects.annotate(
+        day=TruncDate('created_at')
+    ).values('unit_id', 'action', 'day').annotate(total=Count('id')).order_by()
+
+    with transaction.atomic():
+        AuditActivityRollup.objects.all().delete()
+        AuditActivityRollup.objects.bulk_create(
+            [
+                AuditActivityRollup(
+                    unit_id=bucket['unit_id'],
+                    action=bucket['action'],
+                    day=bucket['day'],
+                    count=bucket['total']
+                )
+                for bucket in buckets
+            ],
+            batch_size=1000
+        )
+    return AuditActivityRollup.objects.count()
+
+
+def activity_histogram(units, days=365):
+    """Return per-day action counts for ``units`` over the last ``days`` days.
+
+    ``units`` are units or unit ids; None counts all units.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rollups = AuditActivityRollup.objects.filter(day__gte=since, count__gt=0)
+    if units is not None:
+        rollups = rollups.filter(unit__in=units)
+    return list(
+        rollups.values('day', 'action').annotate(actions=Sum('count')).order_by('day', 'action')
+    )
+
+
+def actions_since(units, since):
+    """Total number of actions recorded for ``units`` (None for all) from day ``since``."""
+    rollups = AuditActivityRollup.objects.filter(day__gte=since)
+    if units is not None:
+        rollups = rollups.filter(unit__in=units)
+    return rollups.aggregate(total=Sum('count'))['total'] or 0
+
+
+def actions_this_month(units):
+    """Total number of actions recorded for ``units`` in the current month."""
+    return actions_since(units, timezone.localdate().replace(day=1))
@@ -4,11 +4,28 @@ from django.urls import reverse
 from django.utils import timezone
 from .models import (
     Unit, UserProfile, Indicator, AnnualPlan, AnnualPlanTarget,
-    QuarterlyReport, QuarterlyIndicatorEntry, ImportBatch, WorkflowAudit
+    QuarterlyReport, QuarterlyIndicatorEntry, ImportBatch, WorkflowAudit,
+    AuditActivityRollup
 )
+from .cache import bump_generation
+from .pagination import EstimatedCountPaginator
 
 # Register your models here.
 
+class DeferredFieldsAdminMixin:
+    """Leave large text columns that list_display never shows out of the changelist query."""
+    changelist_deferred_fields = ()
+    
+    def get_changelist(self, request, **kwargs):
+        ChangeList = super().get_changelist(request, **kwargs)
+        deferred = self.changelist_deferred_fields
+        
+        class DeferredChangeList(ChangeList):
+            def get_queryset(self, request, exclude_parameters=None):
+                return super().get_queryset(request, exclude_parameters).defer(*deferred)
+        
+        return DeferredChangeList if deferred else ChangeList
+
 @admin.register(Unit)
 class UnitAdmin(admin.ModelAdmin):
     list_display = ['name', 'type', 'parent', 'children_count', 'users_count']
@@ -17,13 +34,18 @@ class UnitAdmin(admin.ModelAdmin):
     ordering = ['type', 'name']
     raw_id_fields = ['parent']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_counts()
+    
     def children_count(self, obj):
-        return obj.children.count()
+        return obj.children_count
     children_count.short_description = 'Children'
+    children_count.admin_order_field = 'children_count'
     
     def users_count(self, obj):
-        return obj.users.count()
+        return obj.users_count
     users_count.short_description = 'Users'
+    users_count.admin_order_field = 'users_count'
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -33,8 +55,9 @@ class UserProfileAdmin(admin.ModelAdmin):
     raw_id_fields = ['user', 'unit']
 
 @admin.register(Indicator)
-class IndicatorAdmin(admin.ModelAdmin):
+class IndicatorAdmin(DeferredFieldsAdminMixin, admin.ModelAdmin):
     list_display = ['code', 'name', 'owner_unit', 'unit_of_measure', 'active']
+    changelist_deferred_fields = ['description']
     list_filter = ['owner_unit', 'active']
     search_fields = ['code', 'name', 'description']
     ordering = ['owner_unit__name', 'code']
@@ -69,22 +92,30 @@ class AnnualPlanAdmin(admin.ModelAdmin):
     status_badge.short_description = 'Status'
     
     def approve_plans(self, request, queryset):
-        updated = queryset.filter(status='SUBMITTED').update(
+        submitted = queryset.filter(status='SUBMITTED')
+        unit_ids = list(submitted.values_list('unit_id', flat=True).distinct())
+        updated = submitted.update(
             status='APPROVED',
             approved_by=request.user,
             approved_at=timezone.now()
         )
+        # Bulk updates send no signals
+        bump_generation(*unit_ids)
         self.message_user(request, f'{updated} plans approved successfully.')
     approve_plans.short_description = 'Approve selected plans'
     
     def reject_plans(self, request, queryset):
-        updated = queryset.filter(status='SUBMITTED').update(status='REJECTED')
+        submitted = queryset.filter(status='SUBMITTED')
+        unit_ids = list(submitted.values_list('unit_id', flat=True).distinct())
+        updated = submitted.update(status='REJECTED')
+        bump_generation(*unit_ids)
         self.message_user(request, f'{updated} plans rejected.')
     reject_plans.short_description = 'Reject selected plans'
 
 @admin.register(AnnualPlanTarget)
-class AnnualPlanTargetAdmin(admin.ModelAdmin):
+class AnnualPlanTargetAdmin(DeferredFieldsAdminMixin, admin.ModelAdmin):
     list_display = ['plan', 'indicator', 'target_value', 'baseline_value']
+    changelist_deferred_fields = ['remarks', 'indicator__description']
     list_filter = ['plan__year', 'plan__unit', 'indicator__owner_unit']
     search_fields = ['indicator__code', 'indicator__name']
     raw_id_fields = ['plan', 'indicator']
@@ -119,25 +150,35 @@ class QuarterlyReportAdmin(admin.ModelAdmin):
     status_badge.short_description = 'Status'
     
     def approve_reports(self, request, queryset):
-        updated = queryset.filter(status='SUBMITTED').update(
+        submitted = queryset.filter(status='SUBMITTED')
+        unit_ids = list(submitted.values_list('unit_id', flat=True).distinct())
+        updated = submitted.update(
             status='APPROVED',
             approved_by=request.user,
             approved_at=timezone.now()
         )
+        # Bulk updates send no signals
+        bump_generation(*unit_ids)
         self.message_user(request, f'{updated} reports approved successfully.')
     approve_reports.short_description = 'Approve selected reports'
     
     def reject_reports(self, request, queryset):
-        updated = queryset.filter(status='SUBMITTED').update(status='REJECTED')
+        submitted = queryset.filter(status='SUBMITTED')
+        unit_ids = list(submitted.values_list('unit_id', flat=True).distinct())
+        updated = submitted.update(status='REJECTED')
+        bump_generation(*unit_ids)
         self.message_user(request, f'{updated} reports rejected.')
     reject_reports.short_description = 'Reject selected reports'
 
 @admin.register(QuarterlyIndicatorEntry)
-class QuarterlyIndicatorEntryAdmin(admin.ModelAdmin):
+class QuarterlyIndicatorEntryAdmin(DeferredFieldsAdminMixin, admin.ModelAdmin):
     list_display = ['report', 'indicator', 'achieved_value', 'updated_by', 'updated_at']
+    changelist_deferred_fields = ['remarks', 'indicator__description']
     list_filter = ['report__year', 'report__quarter', 'report__unit', 'indicator__owner_unit']
     search_fields = ['indicator__code', 'indicator__name']
     raw_id_fields = ['report', 'indicator', 'updated_by']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(ImportBatch)
 class ImportBatchAdmin(admin.ModelAdmin):
@@ -148,13 +189,16 @@ class ImportBatchAdmin(admin.ModelAdmin):
     readonly_fields = ['uploaded_at', 'records_inserted', 'records_updated']
 
 @admin.register(WorkflowAudit)
-class WorkflowAuditAdmin(admin.ModelAdmin):
+class WorkflowAuditAdmin(DeferredFieldsAdminMixin, admin.ModelAdmin):
     list_display = ['actor', 'unit', 'action', 'context_plan', 'context_report', 'created_at', 'action_badge']
+    changelist_deferred_fields = ['message', 'changes']
     list_filter = ['action', 'unit__type', 'created_at']
     search_fields = ['actor__username', 'unit__name', 'message']
     raw_id_fields = ['actor', 'unit', 'context_plan', 'context_report']
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def action_badge(self, obj):
         colors = {
@@ -173,6 +217,14 @@ class WorkflowAuditAdmin(admin.ModelAdmin):
         )
     action_badge.short_description = 'Action'
 
+@admin.register(AuditActivityRollup)
+class AuditActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'unit', 'action', 'count']
+    list_filter = ['action', 'unit__type']
+    search_fields = ['unit__name']
+    raw_id_fields = ['unit']
+    date_hierarchy = 'day'
+
 # Inline Admin Classes for better UX
 class AnnualPlanTargetInline(admin.TabularInline):
     model = AnnualPlanTarget
@@ -0,0 +1,155 @@
+"""
+Token authentication backed by the shared cache.
+
+A token's user, with the user's profile and unit, is loaded in one query and
+cached for AUTH_TOKEN_CACHE_TIMEOUT seconds, so authenticated API requests
+do not query the database on a hit. The cache holds the rows' column values,
+not pickled model instances, and never the password hash: cached users are
+rebuilt with the password deferred. Entries are dropped when the token, its
+user, the user's profile or the profile's unit changes (see plans.signals)
+and on logout.
+
+Tokens expire after AUTH_TOKEN_TTL seconds without use. Token.created marks
+the start of the current validity window; using a token moves it forward,
+at most once per AUTH_TOKEN_RENEW_INTERVAL so the hot path stays free of
+writes. Logging in replaces the user's token, logging out deletes it, and
+purge_tokens removes expired tokens and those of deactivated users.
+
+A user has at most one token (Token is one-to-one with User), so sessions
+are exclusive: logging in on a second device revokes the first device's
+token, and logging out anywhere ends the session everywhere.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import Unit, UserProfile
+
+
+def _token_cache_key(key):
+    # Hashed, so raw tokens do not appear in cache key listings
+    return f'plans:auth:token-row:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _user_cache_key(user_id):
+    return f'plans:auth:user:{user_id}'
+
+
+def _row(instance, exclude=()):
+    """Column values of ``instance`` by attribute name, in field order."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in exclude
+    }
+
+
+def _from_row(model, row, db):
+    """Rebuild a ``model`` instance from ``row``; columns it lacks stay deferred."""
+    return model.from_db(db, list(row), list(row.values()))
+
+
+def _token_row(token):
+    """Cacheable values of ``token``, its user, profile and unit, without the password hash."""
+    profile = getattr(token.user, 'profile', None)
+    unit = profile.unit if profile is not None else None
+    return {
+        'token': _row(token),
+        'user': _row(token.user, exclude=('password',)),
+        'profile': _row(profile) if profile is not None else None,
+        'unit': _row(unit) if unit is not None else None,
+    }
+
+
+def _token_from_row(row):
+    """Rebuild the token, user, profile and unit cached by _token_row."""
+    db = router.db_for_read(Token)
+    token = _from_row(Token, row['token'], db)
+    user = _from_row(Token.user.field.related_model, row['user'], db)
+    Token.user.field.set_cached_value(token, user)
+
+    profile = None
+    if row['profile'] is not None:
+        profile = _from_row(UserProfile, row['profile'], db)
+        unit = _from_row(Unit, row['unit'], db) if row['unit'] is not None else None
+        UserProfile.user.field.set_cached_value(profile, user)
+        UserProfile.unit.field.set_cached_value(profile, unit)
+    UserProfile.user.field.remote_field.set_cached_value(user, profile)
+    return token
+
+
+def token_ttl():
+    """How long a token stays valid without use."""
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_TTL', 7 * 24 * 3600))
+
+
+def expired_tokens():
+    """Tokens unused for longer than the token TTL."""
+    return Token.objects.filter(created__lt=timezone.now() - token_ttl())
+
+
+def rotate_token(user):
+    """Replace ``user``'s token with a new one and return it.
+
+    Any earlier token stops working, so only the latest login stays signed in.
+    """
+    with transaction.atomic():
+        Token.objects.filter(user=user).delete()
+        return Token.objects.create(user=user)
+
+
+def invalidate_token(key):
+    """Drop the cached authentication of token ``key``."""
+    cache.delete(_token_cache_key(key))
+
+
+def invalidate_user_tokens(*user_ids):
+    """Drop the cached authentication of the tokens of ``user_ids``."""
+    user_keys = [_user_cache_key(user_id) for user_id in user_ids]
+    token_keys = cache.get_many(user_keys).values()
+    cache.delete_many([*user_keys, *token_keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that keeps tokens, users and profiles in the cache."""
+
+    def authenticate_credentials(self, key):
+        cache_key = _token_cache_key(key)
+        row = cache.get(cache_key)
+        if row is not None:
+            token = _token_from_row(row)
+        else:
+            try:
+                token = self.get_model().objects.select_related('user__profile__unit').get(key=key)
+            except self.get_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+            self.cache_token(token)
+
+        now = timezone.now()
+        if now - token.created > token_ttl():
+            token.delete()
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        if now - token.created > timedelta(seconds=getattr(settings, 'AUTH_TOKEN_RENEW_INTERVAL', 3600)):
+            # update() leaves the cache entry alone; it is replaced below
+            Token.objects.filter(key=token.key).update(created=now)
+            token.created = now
+            self.cache_token(token)
+
+        return token.user, token
+
+    def cache_token(self, token):
+        """Cache ``token`` with its user, profile and unit, indexed by user for invalidation."""
+        cache_key = _token_cache_key(token.key)
+        timeout = getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300)
+        cache.set_many({cache_key: _token_row(token), _user_cache_key(token.user_id): cache_key}, timeout)
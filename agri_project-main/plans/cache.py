@@ -0,0 +1,167 @@
+"""
+Versioned caching of dashboard statistics.
+
+Cached statistics are keyed by the scope they were computed for (a unit, or
+all units for superadmins) and by that scope's data generation. Writes to
+plans, reports, targets, entries, indicators and units bump the generation
+of the unit concerned and of the all-units scope (see plans.signals), so
+stale entries are never read again and simply expire.
+
+Misses are computed once: concurrent requests for the same statistics wait
+for the thread computing them, and other workers wait on a lock key in the
+shared cache.
+
+Rendered detail responses of approved plans and reports are cached under
+their approval time and an output generation of their own, bumped when the
+plan or report, its targets or entries, or any unit or indicator change.
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+ALL_UNITS = 'all'
+# Output generation bumped by unit and indicator changes, whose names appear
+# in every plan and report
+SHARED_OUTPUT = 'output:shared'
+
+# Statistics being computed in this process, by cache key
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class _Flight:
+    """A computation other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+def _generation_key(scope):
+    return f'plans:generation:{scope}'
+
+
+def _new_generation():
+    # Never reuses a value, so a counter lost to eviction cannot revive old entries
+    return time.time_ns()
+
+
+def generation(scope):
+    """Current data generation of ``scope``."""
+    key = _generation_key(scope)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _new_generation(), None)
+        value = cache.get(key)
+    return value
+
+
+def _bump(scope):
+    try:
+        cache.incr(_generation_key(scope))
+    except ValueError:
+        cache.set(_generation_key(scope), _new_generation(), None)
+
+
+def bump_generation(*unit_ids):
+    """Invalidate the statistics of ``unit_ids`` and of the all-units scope."""
+    for scope in {ALL_UNITS, *(unit_id for unit_id in unit_ids if unit_id is not None)}:
+        _bump(scope)
+
+
+def output_scope(label, pk):
+    """Output generation scope of plan or report ``pk``."""
+    return f'output:{label}:{pk}'
+
+
+def bump_output_generation(*scopes):
+    """Invalidate the cached output of ``scopes`` (see output_scope and SHARED_OUTPUT)."""
+    for scope in set(scopes):
+        _bump(scope)
+
+
+def approved_output_key(label, pk, approved_at, variant):
+    """Cache key of the rendered detail response of an approved plan or report.
+
+    ``variant`` names the representation, e.g. media type and query string.
+    """
+    variant = hashlib.md5(variant.encode()).hexdigest()
+    parts = (
+        'plans:output', label, pk, approved_at.isoformat(),
+        generation(output_scope(label, pk)), generation(SHARED_OUTPUT), variant
+    )
+    return ':'.join(str(part) for part in parts)
+
+
+def single_flight(key, compute, timeout):
+    """Value of cache ``key``, computed by ``compute`` by one thread in one worker at a time.
+
+    Threads of this process wait for the thread already computing ``key``.
+    Across workers, the computing worker holds a ``<key>:lock`` cache key
+    while the others poll for the value; a worker that waits longer than
+    STATS_LOCK_TIMEOUT, or sees the lock released without a value, computes
+    the value itself.
+    """
+    with _in_flight_lock:
+        flight = _in_flight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[key] = _Flight()
+
+    if not leader:
+        flight.done.wait(getattr(settings, 'STATS_LOCK_TIMEOUT', 30))
+        if flight.value is not None:
+            return flight.value
+        # The computing thread failed or is still running; compute here
+        return compute()
+
+    try:
+        flight.value = _compute_once(key, compute, timeout)
+        return flight.value
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        flight.done.set()
+
+
+def _compute_once(key, compute, timeout):
+    lock_key = f'{key}:lock'
+    lock_timeout = getattr(settings, 'STATS_LOCK_TIMEOUT', 30)
+    # Identifies this worker's lock, so it never releases another worker's
+    owner = uuid.uuid4().hex
+    locked = cache.add(lock_key, owner, lock_timeout)
+    if not locked:
+        # Another worker is computing the value
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(getattr(settings, 'STATS_LOCK_POLL_INTERVAL', 0.05))
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if cache.add(lock_key, owner, lock_timeout):
+                locked = True  # The lock was released without a value; it is ours now
+                break
+
+    try:
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        # A worker that waited out the timeout computes without the lock
+        if locked and cache.get(lock_key) == owner:
+            cache.delete(lock_key)
+
+
+def cached_stats(name, scope, compute, *params):
+    """Statistics ``name`` of ``scope`` for ``params``, computed by ``compute`` on a miss."""
+    key = ':'.join(str(part) for part in ('plans:stats', name, scope, generation(scope), *params))
+    value = cache.get(key)
+    if value is None:
+        value = single_flight(key, compute, getattr(settings, 'STATS_CACHE_TIMEOUT', 300))
+    return value
@@ -0,0 +1,211 @@
+"""
+Cache backends that keep hit, miss and eviction statistics.
+
+Each backend subclasses its Django counterpart. Counts are kept per process
+and added to totals stored in the cache itself every few seconds, so backends
+shared between workers (file, database, Redis) report totals for all of them.
+Redis reports the server's own keyspace statistics instead, when the server
+answers INFO.
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache as BaseDatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache as BaseFileBasedCache
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+from django.db import connections, router
+
+STAT_NAMES = ('hits', 'misses', 'evictions')
+
+# Counts not yet added to the shared totals, per backend class
+_pending = {}
+_last_flush = {}
+_lock = threading.Lock()
+# Set while a backend reads or writes its own statistics, and while get() and
+# get_many() call each other, so those lookups are not counted again
+_suspended = threading.local()
+
+
+@contextmanager
+def stats_suspended():
+    """Do not count cache lookups made in the current thread."""
+    previous = getattr(_suspended, 'active', False)
+    _suspended.active = True
+    try:
+        yield
+    finally:
+        _suspended.active = previous
+
+
+class CacheStatsMixin:
+    """Count hits, misses and evictions of a cache backend."""
+    stats_key_prefix = 'plans:cache-stats'
+    stats_flush_interval = 10  # seconds
+
+    def get(self, key, default=None, version=None):
+        with stats_suspended():
+            value = super().get(key, self._missing_key, version=version)
+        self.record_stats(hits=int(value is not self._missing_key), misses=int(value is self._missing_key))
+        return default if value is self._missing_key else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with stats_suspended():
+            values = super().get_many(keys, version=version)
+        self.record_stats(hits=len(values), misses=len(keys) - len(values))
+        return values
+
+    def count_stats(self, **counts):
+        """Add ``counts`` to this process's pending counts."""
+        if getattr(_suspended, 'active', False):
+            return
+        with _lock:
+            _pending.setdefault(type(self).__name__, Counter()).update(counts)
+
+    def record_stats(self, **counts):
+        """Count ``counts``, adding pending counts to the shared totals when due."""
+        if getattr(_suspended, 'active', False):
+            return
+        self.count_stats(**counts)
+        name = type(self).__name__
+        now = time.monotonic()
+        with _lock:
+            if now - _last_flush.setdefault(name, now) < self.stats_flush_interval:
+                return
+            _last_flush[name] = now
+            pending = _pending.pop(name, Counter())
+        self.flush_stats(pending)
+
+    def flush_stats(self, counts):
+        """Add ``counts`` to the totals shared by all processes."""
+        with stats_suspended():
+            for stat, count in counts.items():
+                if not count:
+                    continue
+                key = f'{self.stats_key_prefix}:{stat}'
+                try:
+                    self.incr(key, count)
+                except ValueError:
+                    if not self.add(key, count, None):
+                        self.incr(key, count)
+
+    def entry_count(self):
+        """Number of entries held, or None when the backend cannot tell."""
+        return None
+
+    def stats(self):
+        """Hit, miss and eviction totals of this cache."""
+        with _lock:
+            pending = _pending.pop(type(self).__name__, Counter())
+        self.flush_stats(pending)
+
+        with stats_suspended():
+            totals = self.get_many([f'{self.stats_key_prefix}:{stat}' for stat in STAT_NAMES])
+        stats = {stat: totals.get(f'{self.stats_key_prefix}:{stat}', 0) for stat in STAT_NAMES}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+        stats['entries'] = self.entry_count()
+        stats['backend'] = type(self).__name__
+        return stats
+
+
+class LocMemCache(CacheStatsMixin, BaseLocMemCache):
+    """Per-process memory cache; entries and statistics are not shared between workers."""
+
+    # Culling runs under the backend's lock, so evictions are only counted there
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        self.count_stats(evictions=before - len(self._cache))
+
+    def entry_count(self):
+        return len(self._cache)
+
+
+class FileBasedCache(CacheStatsMixin, BaseFileBasedCache):
+    """Cache in a directory shared by all workers on a host."""
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set ``key`` unless it exists; only one of several processes adding it succeeds."""
+        if self.has_key(key, version):  # Also removes an expired entry
+            return False
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            # Unlike the rename in set(), linking fails when the entry already exists
+            os.link(tmp_path, fname)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def _cull(self):
+        # Django's _cull(), counting the files it deletes from its one directory listing
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self.count_stats(evictions=num_entries)
+            return self.clear()
+        filelist = random.sample(filelist, int(num_entries / self._cull_frequency))
+        self.count_stats(evictions=sum(self._delete(fname) for fname in filelist))
+
+    def entry_count(self):
+        return len(self._list_cache_files())
+
+
+class DatabaseCache(CacheStatsMixin, BaseDatabaseCache):
+    """Cache table shared by all workers; see plans.db_routers for a separate SQLite file."""
+
+    def _cull(self, db, cursor, now, num):
+        super()._cull(db, cursor, now, num)
+        cursor.execute('SELECT COUNT(*) FROM %s' % connections[db].ops.quote_name(self._table))
+        # Includes expired entries removed along the way
+        self.count_stats(evictions=num - cursor.fetchone()[0])
+
+    def entry_count(self):
+        db = router.db_for_read(self.cache_model_class)
+        with connections[db].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM %s' % connections[db].ops.quote_name(self._table))
+            return cursor.fetchone()[0]
+
+
+class RedisCache(CacheStatsMixin, BaseRedisCache):
+    """Redis (or Redis-compatible server) cache.
+
+    Statistics come from the server's keyspace counters, or from the counts
+    kept here when the server does not answer INFO (some managed services and
+    test servers disable it).
+    """
+
+    def entry_count(self):
+        return self._cache.get_client().dbsize()
+
+    def stats(self):
+        client = self._cache.get_client()
+        try:
+            info = client.info('stats')
+        except self._cache._lib.ResponseError:
+            return super().stats()
+        hits, misses = info.get('keyspace_hits', 0), info.get('keyspace_misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': info.get('evicted_keys', 0),
+            'hit_rate': hits / (hits + misses) if hits + misses else None,
+            'entries': self.entry_count(),
+            'backend': type(self).__name__,
+        }
@@ -0,0 +1,30 @@
+"""
+Database routers for the plans project.
+"""
+
+
+class CacheRouter:
+    """Keep the database cache table in the ``cache`` database.
+
+    Used with ``CACHE_BACKEND=sqlite``, where the cache lives in its own SQLite
+    file so cache writes do not contend with the main database. Create the
+    table with ``manage.py createcachetable --database cache``.
+    """
+    database = 'cache'
+    # App label of DatabaseCache's internal model
+    cache_app_label = 'django_cache'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == self.cache_app_label:
+            return self.database
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_migrate(self, db, app_label, **hints):
+        if app_label == self.cache_app_label:
+            return db == self.database
+        if db == self.database:
+            return False
+        return None
@@ -0,0 +1,102 @@
+"""
+In-process pub/sub fan-out of workflow audit events.
+
+Audit rows are published once their transaction commits and delivered to
+the activity stream subscribers allowed to see the row's unit. Delivery is
+per process: each ASGI worker fans out the audit rows written through it,
+and clients resume from their Last-Event-ID on reconnect.
+"""
+import asyncio
+import threading
+
+
+def audit_event(audit):
+    """Flat, JSON-ready representation of an audit row for the activity feed."""
+    return {
+        'id': audit.id,
+        'action': audit.action,
+        'action_display': audit.get_action_display(),
+        'message': audit.message,
+        'created_at': audit.created_at.isoformat() if audit.created_at else None,
+        'actor': {
+            'id': audit.actor_id,
+            'username': audit.actor.username,
+            'first_name': audit.actor.first_name,
+            'last_name': audit.actor.last_name,
+        },
+        'unit': {
+            'id': audit.unit_id,
+            'name': audit.unit.name,
+            'type': audit.unit.type,
+        },
+        'context_plan_id': audit.context_plan_id,
+        'context_report_id': audit.context_report_id,
+        'entity_type': audit.entity_type,
+        'entity_id': audit.entity_id,
+        'changes': audit.changes,
+    }
+
+
+class Subscription:
+    """Event queue of one stream client, bound to the client's event loop."""
+
+    def __init__(self, loop, unit_ids, max_queue):
+        self.loop = loop
+        self.unit_ids = unit_ids
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def wants(self, event):
+        return self.unit_ids is None or event['unit']['id'] in self.unit_ids
+
+    def push(self, event):
+        """Queue an event from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The client's loop has already shut down
+            pass
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client; it catches up from Last-Event-ID on reconnect
+            pass
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class ActivityBroker:
+    """Fan audit events out to the subscribed stream clients."""
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, unit_ids=None):
+        """Subscribe the running event loop; ``unit_ids=None`` receives every unit."""
+        subscription = Subscription(asyncio.get_running_loop(), unit_ids, self.max_queue)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.wants(event):
+                subscription.push(event)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+broker = ActivityBroker()
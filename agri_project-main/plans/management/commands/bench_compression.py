@@ -0,0 +1,88 @@
+"""
+Management command to measure bytes on the wire for typical API endpoints.
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.utils import timezone
+
+from plans.middleware import brotli
+from plans.models import (
+    AnnualPlan, AnnualPlanTarget, Indicator, QuarterlyIndicatorEntry, QuarterlyReport,
+    Unit, UserProfile, WorkflowAudit
+)
+
+
+ENDPOINTS = [
+    '/api/units/',
+    '/api/indicators/',
+    '/api/annual-plans/',
+    '/api/quarterly-reports/',
+    '/api/audit/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Report response sizes per Accept-Encoding for typical endpoints; sample data is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--indicators',
+            type=int,
+            default=500,
+            help='Indicators (and plan targets / report entries) in the sample data',
+        )
+
+    def handle(self, *args, **options):
+        encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed; only gzip is measured'))
+
+        with transaction.atomic():
+            user = self.sample_data(options['indicators'])
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(user)
+
+            self.stdout.write(f"{'endpoint':<28}" + ''.join(f'{encoding:>12}' for encoding in encodings))
+            for endpoint in ENDPOINTS:
+                sizes = []
+                for encoding in encodings:
+                    response = client.get(endpoint, HTTP_ACCEPT_ENCODING=encoding)
+                    sizes.append(len(response.content))
+                ratio = sizes[0] / min(sizes[1:])
+                self.stdout.write(
+                    f'{endpoint:<28}' + ''.join(f'{size:>12,}' for size in sizes) + f'   {ratio:.1f}x smaller'
+                )
+
+            transaction.set_rollback(True)
+
+    def sample_data(self, count):
+        """A superadmin and a unit with ``count`` indicators, targets and entries."""
+        year = timezone.now().year
+        unit = Unit.objects.create(name='Benchmark Unit', type='STRATEGIC')
+        user = User.objects.create_user('benchmark-compression')
+        UserProfile.objects.create(user=user, role='SUPERADMIN', unit=unit)
+
+        indicators = Indicator.objects.bulk_create([
+            Indicator(
+                code=f'BENCH-{index}', name=f'Benchmark indicator {index}', owner_unit=unit,
+                description='Share of households reached by the extension programme', unit_of_measure='%'
+            )
+            for index in range(count)
+        ])
+        plan = AnnualPlan.objects.create(year=year, unit=unit, created_by=user)
+        AnnualPlanTarget.objects.bulk_create([
+            AnnualPlanTarget(plan=plan, indicator=indicator, target_value=index * 1.5, baseline_value=index)
+            for index, indicator in enumerate(indicators)
+        ])
+        report = QuarterlyReport.objects.create(year=year, quarter=1, unit=unit, created_by=user)
+        QuarterlyIndicatorEntry.objects.bulk_create([
+            QuarterlyIndicatorEntry(report=report, indicator=indicator, achieved_value=index, updated_by=user)
+            for index, indicator in enumerate(indicators)
+        ])
+        WorkflowAudit.objects.bulk_create([
+            WorkflowAudit(actor=user, unit=unit, action='UPDATE', context_plan=plan, message=f'Updated target {index}')
+            for index in range(count)
+        ])
+        return user
@@ -0,0 +1,103 @@
+"""
+Management command to compare API renderers on a large annual plan.
+"""
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from plans.models import AnnualPlan, AnnualPlanTarget, Indicator, Unit
+from plans.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from plans.serializers import AnnualPlanSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark render time, size and client decode time of a plan with many targets; sample data is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--targets',
+            type=int,
+            default=1000,
+            help='Number of targets on the sample plan',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Renders per renderer',
+        )
+
+    def handle(self, *args, **options):
+        targets = options['targets']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            data = self.sample_plan_data(targets)
+            transaction.set_rollback(True)
+
+        # (name, renderer, client-side decoder)
+        renderers = [
+            ('JSONRenderer', JSONRenderer(), json.loads),
+            ('ORJSONRenderer', ORJSONRenderer(), json.loads),
+        ]
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; ORJSONRenderer uses the stdlib fallback'))
+        if msgpack is not None:
+            renderers.append(('MessagePackRenderer', MessagePackRenderer(), msgpack.unpackb))
+        else:
+            self.stdout.write(self.style.WARNING('msgpack is not installed; skipping MessagePackRenderer'))
+
+        reference = None
+        timings = {}
+        for name, renderer, decode in renderers:
+            output = renderer.render(data)
+            if reference is None:
+                reference = decode(output)
+            elif decode(output) != reference:
+                self.stdout.write(self.style.ERROR(f'{name} output differs from JSONRenderer'))
+
+            render_time = self.per_run(repeat, lambda: renderer.render(data))
+            decode_time = self.per_run(repeat, lambda: decode(output))
+            timings[name] = render_time
+            self.stdout.write(
+                f'{name}: {render_time * 1000:.2f} ms per render, {len(output):,} bytes, '
+                f'{decode_time * 1000:.2f} ms to decode'
+            )
+
+        baseline = timings['JSONRenderer']
+        for name, elapsed in timings.items():
+            if name != 'JSONRenderer':
+                self.stdout.write(self.style.SUCCESS(f'{name} renders {baseline / elapsed:.1f}x faster for {targets} targets'))
+
+    def per_run(self, repeat, run):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        return (time.perf_counter() - started) / repeat
+
+    def sample_plan_data(self, targets):
+        """Serialized data of a plan with ``targets`` targets."""
+        unit = Unit.objects.create(name='Benchmark Unit', type='STRATEGIC')
+        user = User.objects.create_user('benchmark-renderer')
+        plan = AnnualPlan.objects.create(year=2000, unit=unit, created_by=user)
+        indicators = Indicator.objects.bulk_create([
+            Indicator(code=f'BENCH-{index}', name=f'Benchmark indicator {index}', owner_unit=unit, unit_of_measure='%')
+            for index in range(targets)
+        ])
+        AnnualPlanTarget.objects.bulk_create([
+            AnnualPlanTarget(
+                plan=plan, indicator=indicator, target_value=index * 1.5, baseline_value=index,
+                remarks=f'Target remarks {index}'
+            )
+            for index, indicator in enumerate(indicators)
+        ])
+
+        plan = AnnualPlan.objects.select_related('unit', 'created_by').prefetch_related(
+            Prefetch('targets', queryset=AnnualPlanTarget.objects.select_related('indicator'))
+        ).get(pk=plan.pk)
+        return AnnualPlanSerializer(plan).data
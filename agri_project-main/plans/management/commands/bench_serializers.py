@@ -0,0 +1,78 @@
+"""
+Management command to compare ModelSerializer and ValuesSerializer throughput.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from plans.models import Indicator, Unit
+from plans.serializers import IndicatorSerializer, ValuesSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark indicator list serialization (rows/sec); sample data is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Number of indicators to serialize',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per serializer; the best run is reported',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            unit = Unit.objects.create(name='Benchmark Unit', type='STRATEGIC')
+            Indicator.objects.bulk_create(
+                [
+                    Indicator(
+                        code=f'BENCH-{index}',
+                        name=f'Benchmark indicator {index}',
+                        description='Benchmark indicator description',
+                        owner_unit=unit,
+                        unit_of_measure='%'
+                    )
+                    for index in range(rows)
+                ],
+                batch_size=1000
+            )
+            queryset = Indicator.objects.filter(owner_unit=unit).order_by('id')
+
+            model_rate = self.best_rate(
+                rows, repeat,
+                lambda: IndicatorSerializer(queryset.select_related('owner_unit'), many=True).data
+            )
+            values_serializer = ValuesSerializer(IndicatorSerializer)
+            values_rate = self.best_rate(
+                rows, repeat,
+                lambda: values_serializer.render(values_serializer.values(queryset))
+            )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'IndicatorSerializer: {model_rate:,.0f} rows/sec')
+        self.stdout.write(f'ValuesSerializer:    {values_rate:,.0f} rows/sec')
+        self.stdout.write(
+            self.style.SUCCESS(f'ValuesSerializer is {values_rate / model_rate:.1f}x faster for {rows} indicators')
+        )
+
+    def best_rate(self, rows, repeat, serialize):
+        """Rows per second of the fastest run, query time included."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            elapsed = time.perf_counter() - started
+            assert len(data) == rows
+            best = elapsed if best is None else min(best, elapsed)
+        return rows / best
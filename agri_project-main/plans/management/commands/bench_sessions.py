@@ -0,0 +1,62 @@
+"""
+Management command to compare session engines for browser API requests.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from plans.models import Unit, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Time session-authenticated API requests and count session table queries per session engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per engine',
+        )
+        parser.add_argument(
+            '--path',
+            default='/api/auth/me/',
+            help='Endpoint requested',
+        )
+
+    def handle(self, *args, **options):
+        count = options['requests']
+
+        with transaction.atomic():
+            unit = Unit.objects.create(name='Benchmark Unit', type='STRATEGIC')
+            user = User.objects.create_user('benchmark-sessions')
+            UserProfile.objects.create(user=user, role='SUPERADMIN', unit=unit)
+
+            self.stdout.write(f"{'engine':<16}{'ms/request':>12}{'session queries':>18}{'queries':>10}")
+            for name, engine in settings.SESSION_ENGINES.items():
+                with override_settings(SESSION_ENGINE=engine):
+                    client = Client(HTTP_HOST='localhost')
+                    client.force_login(user)
+                    client.get(options['path'])  # Warm-up; fills the cache for cached_db
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        for _ in range(count):
+                            client.get(options['path'])
+                        elapsed = time.perf_counter() - started
+
+                    # Deletes the session; the rollback below does not reach cached_db's cache entry
+                    client.logout()
+
+                session_queries = sum('django_session' in query['sql'] for query in queries.captured_queries)
+                self.stdout.write(
+                    f'{name:<16}{elapsed / count * 1000:>12.2f}'
+                    f'{session_queries / count:>18.2f}{len(queries.captured_queries) / count:>10.2f}'
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,48 @@
+"""
+Management command to delete expired API tokens and those of deactivated users.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from plans.authentication import expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete API tokens unused for longer than AUTH_TOKEN_TTL and tokens of deactivated users, '
+        'in batches; run it periodically (e.g. daily from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tokens deleted per statement',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to wait between batches',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        stale = (expired_tokens() | Token.objects.filter(user__is_active=False)).order_by('created')
+
+        deleted = 0
+        while True:
+            keys = list(stale.values_list('key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            # Deleting each batch's tokens also drops their cached authentication (plans.signals)
+            deleted += Token.objects.filter(key__in=keys).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired or deactivated token(s)'))
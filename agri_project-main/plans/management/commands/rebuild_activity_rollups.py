@@ -0,0 +1,17 @@
+"""
+Management command to rebuild the daily audit activity rollups.
+"""
+from django.core.management.base import BaseCommand
+
+from plans.activity import rebuild_activity_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute audit activity rollups from the full workflow audit log'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding audit activity rollups...')
+        buckets = rebuild_activity_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {buckets} activity rollup bucket(s)')
+        )
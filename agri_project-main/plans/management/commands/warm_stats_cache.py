@@ -0,0 +1,50 @@
+"""
+Management command to precompute dashboard and unit statistics into the cache.
+"""
+import time
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from plans.models import Unit
+from plans.warmup import warm_stats
+
+
+class Command(BaseCommand):
+    help = 'Compute dashboard, performance and unit statistics into the cache, e.g. after a deploy or quarter close'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--unit',
+            type=int,
+            action='append',
+            dest='units',
+            help='Only warm this unit (repeatable); the all-units statistics are always warmed',
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            action='append',
+            dest='years',
+            default=[],
+            help='Also warm this year (repeatable); the current year is always warmed',
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[DEFAULT_CACHE_ALIAS]
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            # Values computed here would be gone when this command exits
+            raise CommandError(
+                f'The {type(cache).__name__} cache is not shared with the web workers; '
+                'set CACHE_BACKEND to file, sqlite or redis'
+            )
+
+        units = Unit.objects.filter(id__in=options['units']) if options['units'] else None
+
+        started = time.perf_counter()
+        count = warm_stats(units, options['years'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Warmed statistics of {count} unit(s) in {time.perf_counter() - started:.2f}s')
+        )
@@ -0,0 +1,209 @@
+"""
+Middleware for the plans project.
+"""
+import gzip
+import secrets
+import string
+import struct
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_string
+
+from .access import get_access_context
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Content types that are binary or already compressed, or must not be buffered (event streams)
+SKIPPED_CONTENT_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff', 'text/event-stream', 'application/octet-stream',
+    'application/zip', 'application/gzip', 'application/x-gzip', 'application/pdf',
+    'application/x-7z-compressed', 'application/x-rar-compressed', 'application/vnd.rar',
+    'application/x-bzip2', 'application/x-xz', 'application/zstd', 'application/java-archive',
+    'application/epub+zip', 'application/vnd.openxmlformats-officedocument.',
+    'application/vnd.oasis.opendocument.',
+)
+# Compressible types that share a skipped prefix
+COMPRESSIBLE_CONTENT_TYPES = ('image/svg+xml',)
+
+BROTLI_LGWIN = 22
+# What the Brotli encoder writes when flushed before any input: the stream
+# header for BROTLI_LGWIN and an empty metadata block
+BROTLI_EMPTY_START = b'\x6b\x00'
+
+
+def accepted_encodings(header):
+    """Encodings named in an Accept-Encoding header with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def random_padding(max_random_bytes):
+    """1 to ``max_random_bytes`` random letters, as Django's GZipMiddleware uses for BREACH mitigation."""
+    length = secrets.randbelow(max_random_bytes) + 1
+    return ''.join(secrets.choice(string.ascii_letters) for _ in range(length)).encode()
+
+
+def brotli_header(padding):
+    """Brotli stream header for BROTLI_LGWIN, then a metadata block holding ``padding``.
+
+    Decoders skip metadata blocks, so the padding varies the compressed length
+    the way the random file name does in a gzip header.
+    """
+    skip = len(padding) - 1
+    skip_bytes = max(1, (skip.bit_length() + 7) // 8)
+    # Least significant bit first: WBITS (1, 101), ISLAST 0, MNIBBLES 11 (metadata),
+    # a reserved 0 bit, MSKIPBYTES and MSKIPLEN - 1, then zero bits up to a byte boundary
+    bits = 0b1011 | 0b0110 << 4 | skip_bytes << 8 | skip << 10
+    return bits.to_bytes((10 + 8 * skip_bytes + 7) // 8, 'little') + padding
+
+
+class StreamCompressor:
+    """Brotli or gzip compression of a body in chunks, with a randomly padded header.
+
+    ``header`` is sent first. compress() flushes each chunk's output by
+    default, so streamed chunks are never held back.
+    """
+
+    def __init__(self, encoding, max_random_bytes):
+        self.encoding = encoding
+        padding = random_padding(max_random_bytes)
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(
+                quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5), lgwin=BROTLI_LGWIN
+            )
+            start = self.compressor.flush()
+            self.header = brotli_header(padding) if start == BROTLI_EMPTY_START else start
+        else:
+            self.compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            self.crc = self.size = 0
+            # The padding goes in the file name field, as in django.utils.text.compress_string()
+            self.header = b'\x1f\x8b\x08' + bytes([gzip.FNAME]) + b'\x00\x00\x00\x00\x00\xff' + padding + b'\x00'
+
+    def compress(self, chunk, flush=True):
+        if self.encoding == 'br':
+            data = self.compressor.process(chunk)
+            return data + self.compressor.flush() if flush else data
+
+        self.crc = zlib.crc32(chunk, self.crc)
+        self.size += len(chunk)
+        data = self.compressor.compress(chunk)
+        return data + self.compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush() + struct.pack('<II', self.crc, self.size & 0xffffffff)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Brotli or gzip response compression, chosen from the request's Accept-Encoding.
+
+    Brotli is preferred when the ``brotli`` package is installed. Bodies under
+    COMPRESSION_MIN_LENGTH bytes, responses that already have a Content-Encoding
+    and binary or already-compressed media are sent as they are. Streaming
+    responses are compressed chunk by chunk.
+    """
+    # Random header padding of both encodings, as in Django's GZipMiddleware (BREACH mitigation)
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = self.compress_stream(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is no longer byte-identical to a strong ETag's
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def is_compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type.startswith(SKIPPED_CONTENT_TYPES) and content_type not in COMPRESSIBLE_CONTENT_TYPES:
+            return False
+
+        min_length = getattr(settings, 'COMPRESSION_MIN_LENGTH', 1024)
+        if response.streaming:
+            # Streams of unknown length are compressed
+            length = response.get('Content-Length')
+            return length is None or int(length) >= min_length
+        return len(response.content) >= min_length
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            compressor = StreamCompressor(encoding, self.max_random_bytes)
+            return compressor.header + compressor.compress(content, flush=False) + compressor.finish()
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, chunks, encoding):
+        compressor = StreamCompressor(encoding, self.max_random_bytes)
+        yield compressor.header
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+
+    async def compress_async_stream(self, chunks, encoding):
+        compressor = StreamCompressor(encoding, self.max_random_bytes)
+        yield compressor.header
+        async for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+
+
+class AccessContextMiddleware:
+    """Attach the requesting user's access context (plans.access) as ``request.access``.
+
+    Resolved on first use, so it must follow AuthenticationMiddleware. API views
+    authenticate tokens themselves and use BaseViewSet.access, which resolves
+    the same context from the authenticated user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.access = SimpleLazyObject(lambda: get_access_context(request.user))
+        return self.get_response(request)
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_activity_rollups(apps, schema_editor):
+    WorkflowAudit = apps.get_model('plans', 'WorkflowAudit')
+    AuditActivityRollup = apps.get_model('plans', 'AuditActivityRollup')
+
+    buckets = WorkflowAudit.objects.annotate(
+        day=TruncDate('created_at')
+    ).values('unit_id', 'action', 'day').annotate(total=Count('id')).order_by()
+
+    AuditActivityRollup.objects.bulk_create(
+        [
+            AuditActivityRollup(
+                unit_id=bucket['unit_id'],
+                action=bucket['action'],
+                day=bucket['day'],
+                count=bucket['total']
+            )
+            for bucket in buckets
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0002_update_unit_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workflowaudit',
+            name='action',
+            field=models.CharField(choices=[('CREATE', 'Create'), ('SUBMIT', 'Submit'), ('APPROVE', 'Approve'), ('REJECT', 'Reject'), ('IMPORT', 'Import'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='AuditActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('CREATE', 'Create'), ('SUBMIT', 'Submit'), ('APPROVE', 'Approve'), ('REJECT', 'Reject'), ('IMPORT', 'Import'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=10)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='plans.unit')),
+            ],
+            options={
+                'ordering': ['-day', 'unit__name', 'action'],
+                'indexes': [models.Index(fields=['day', 'unit'], name='plans_audit_day_90df0c_idx')],
+                'unique_together': {('unit', 'action', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_activity_rollups, migrations.RunPython.noop),
+    ]
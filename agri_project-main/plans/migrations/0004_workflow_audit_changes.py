@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:52
+
+import django.core.serializers.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0003_audit_activity_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowaudit',
+            name='changes',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.AddField(
+            model_name='workflowaudit',
+            name='entity_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workflowaudit',
+            name='entity_type',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='workflowaudit',
+            index=models.Index(fields=['entity_type', 'entity_id', '-created_at'], name='plans_workf_entity__0e6212_idx'),
+        ),
+    ]
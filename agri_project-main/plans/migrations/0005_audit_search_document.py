@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FTS_TABLE = 'plans_auditsearch_fts'
+
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5(
+        content, content='plans_auditsearchdocument', content_rowid='audit_id'
+    )""",
+    f"""CREATE TRIGGER plans_auditsearch_ai AFTER INSERT ON plans_auditsearchdocument BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, content) VALUES (new.audit_id, new.content);
+    END""",
+    f"""CREATE TRIGGER plans_auditsearch_ad AFTER DELETE ON plans_auditsearchdocument BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, content) VALUES ('delete', old.audit_id, old.content);
+    END""",
+    f"""CREATE TRIGGER plans_auditsearch_au AFTER UPDATE ON plans_auditsearchdocument BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, content) VALUES ('delete', old.audit_id, old.content);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, content) VALUES (new.audit_id, new.content);
+    END""",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS plans_auditsearch_au',
+    'DROP TRIGGER IF EXISTS plans_auditsearch_ad',
+    'DROP TRIGGER IF EXISTS plans_auditsearch_ai',
+    f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}',
+]
+
+POSTGRES_CREATE = [
+    """CREATE INDEX plans_auditsearch_content_gin ON plans_auditsearchdocument
+        USING GIN (to_tsvector('simple', content))""",
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS plans_auditsearch_content_gin',
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_CREATE,
+        'postgresql': POSTGRES_CREATE,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_DROP,
+        'postgresql': POSTGRES_DROP,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def backfill_search_documents(apps, schema_editor):
+    WorkflowAudit = apps.get_model('plans', 'WorkflowAudit')
+    AuditSearchDocument = apps.get_model('plans', 'AuditSearchDocument')
+
+    rows = WorkflowAudit.objects.values_list(
+        'id', 'message', 'actor__username', 'actor__first_name',
+        'actor__last_name', 'unit__name', 'action'
+    ).order_by('id')
+
+    documents = []
+    for audit_id, *parts in rows.iterator(chunk_size=1000):
+        content = ' '.join(part for part in parts if part)
+        documents.append(AuditSearchDocument(audit_id=audit_id, content=content))
+        if len(documents) >= 1000:
+            AuditSearchDocument.objects.bulk_create(documents)
+            documents = []
+    AuditSearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0004_workflow_audit_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditSearchDocument',
+            fields=[
+                ('audit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='plans.workflowaudit')),
+                ('content', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
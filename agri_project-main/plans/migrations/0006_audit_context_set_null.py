@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0005_audit_search_document'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workflowaudit',
+            name='context_plan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to='plans.annualplan'),
+        ),
+        migrations.AlterField(
+            model_name='workflowaudit',
+            name='context_report',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to='plans.quarterlyreport'),
+        ),
+    ]
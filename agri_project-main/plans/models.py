@@ -1,7 +1,19 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 
+class UnitQuerySet(models.QuerySet):
+    def with_counts(self, children=True, users=True, parent=True):
+        """Load the parent and children/users counts rendered by unit listings."""
+        queryset = self.select_related('parent') if parent else self
+        if children:
+            queryset = queryset.annotate(children_count=models.Count('children', distinct=True))
+        if users:
+            queryset = queryset.annotate(users_count=models.Count('users', distinct=True))
+        return queryset
+
+
 class Unit(models.Model):
     """Organizational units in the ministry hierarchy."""
     TYPE_CHOICES = [
@@ -13,6 +25,8 @@ class Unit(models.Model):
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='children')
 
+    objects = UnitQuerySet.as_manager()
+
     class Meta:
         ordering = ['type', 'name']
 
@@ -51,6 +65,14 @@ class Indicator(models.Model):
         return f'{self.code} - {self.name}'
 
 
+class AnnualPlanQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Load the unit, creator and target count rendered by plan list serializers."""
+        return self.select_related('unit', 'created_by').annotate(
+            targets_count=models.Count('targets')
+        )
+
+
 class AnnualPlan(models.Model):
     """Annual plan per State Minister Office or Advisor Office with approval flow."""
     STATUS_CHOICES = [
@@ -69,6 +91,9 @@ class AnnualPlan(models.Model):
     # Optional explicit entry window override; if null, default rule is 30 days from Jan 1
     entry_window_start = models.DateTimeField(null=True, blank=True)
     entry_window_end = models.DateTimeField(null=True, blank=True)
+
+    objects = AnnualPlanQuerySet.as_manager()
+
     class Meta:
         unique_together = [('year', 'unit')]
         ordering = ['-year', 'unit__name']
@@ -102,6 +127,14 @@ class AnnualPlanTarget(models.Model):
         unique_together = [('plan', 'indicator')]
         ordering = ['indicator__code']
 
+class QuarterlyReportQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Load the unit, creator and entry count rendered by report list serializers."""
+        return self.select_related('unit', 'created_by').annotate(
+            entries_count=models.Count('entries')
+        )
+
+
 class QuarterlyReport(models.Model):
     """Quarterly performance report with approval flow and entry window."""
     STATUS_CHOICES = [
@@ -124,6 +157,8 @@ class QuarterlyReport(models.Model):
     entry_window_start = models.DateTimeField(null=True, blank=True)
     entry_window_end = models.DateTimeField(null=True, blank=True)
 
+    objects = QuarterlyReportQuerySet.as_manager()
+
     class Meta:
         unique_together = [('year', 'quarter', 'unit')]
         ordering = ['-year', '-quarter', 'unit__name']
@@ -193,6 +228,16 @@ class ImportBatch(models.Model):
     notes = models.TextField(blank=True, null=True)
 
 
+class WorkflowAuditQuerySet(models.QuerySet):
+    def feed(self):
+        """Flat rows with actor and unit names, rendered by WorkflowAuditFeedSerializer."""
+        return self.values(
+            'id', 'action', 'message', 'created_at', 'context_plan_id', 'context_report_id',
+            'entity_type', 'entity_id', 'actor_id', 'actor__username', 'actor__first_name',
+            'actor__last_name', 'unit_id', 'unit__name', 'unit__type'
+        )
+
+
 class WorkflowAudit(models.Model):
     """Audit trail for submissions and approvals."""
     ACTION_CHOICES = [
@@ -207,9 +252,47 @@ class WorkflowAudit(models.Model):
     actor = models.ForeignKey(User, on_delete=models.PROTECT, related_name='wf_actions')
     unit = models.ForeignKey(Unit, on_delete=models.PROTECT, related_name='wf_logs')
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
-    context_plan = models.ForeignKey(AnnualPlan, null=True, blank=True, on_delete=models.CASCADE, related_name='audit_logs')
-    context_report = models.ForeignKey(QuarterlyReport, null=True, blank=True, on_delete=models.CASCADE, related_name='audit_logs')
+    # SET_NULL keeps the trail of deleted plans and reports; entity_type/entity_id still identify them
+    context_plan = models.ForeignKey(AnnualPlan, null=True, blank=True, on_delete=models.SET_NULL, related_name='audit_logs')
+    context_report = models.ForeignKey(QuarterlyReport, null=True, blank=True, on_delete=models.SET_NULL, related_name='audit_logs')
     message = models.TextField(blank=True, null=True)
+    # Structured record of the affected object; changes maps field -> [old, new]
+    entity_type = models.CharField(max_length=40, blank=True, default='')
+    entity_id = models.PositiveBigIntegerField(null=True, blank=True)
+    changes = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = WorkflowAuditQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['entity_type', 'entity_id', '-created_at'])]
+
+
+class AuditActivityRollup(models.Model):
+    """Daily count of workflow actions per unit, kept in step with WorkflowAudit."""
+    unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name='activity_rollups')
+    action = models.CharField(max_length=10, choices=WorkflowAudit.ACTION_CHOICES)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('unit', 'action', 'day')]
+        indexes = [models.Index(fields=['day', 'unit'])]
+        ordering = ['-day', 'unit__name', 'action']
+
+    def __str__(self):
+        return f'{self.unit.name} - {self.action} on {self.day}: {self.count}'
+
+
+class AuditSearchDocument(models.Model):
+    """Searchable text of an audit row: message plus actor and unit names.
+
+    The full-text index over ``content`` is vendor specific (FTS5 on SQLite,
+    a GIN tsvector index on PostgreSQL) and is created in migrations.
+    """
+    audit = models.OneToOneField(WorkflowAudit, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    content = models.TextField()
+
+    def __str__(self):
+        return f'Search document for audit {self.audit_id}'
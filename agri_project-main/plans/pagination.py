@@ -0,0 +1,126 @@
+"""
+Pagination with estimated counts for large tables.
+
+Exact ``COUNT(*)`` grows with the table, so unfiltered listings use the
+planner's row estimate on PostgreSQL (``pg_class.reltuples``) or a
+periodically refreshed cached count elsewhere. Filtered listings count at
+most FILTERED_COUNT_LIMIT rows.
+
+The count only sizes the page links. Whether a page exists, and whether
+another follows it, is decided by fetching one row more than the page holds,
+so pages past a capped or stale count are still served.
+"""
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+# Below this many rows an exact count is cheap, and reltuples may be stale
+ESTIMATE_THRESHOLD = 10000
+COUNT_CACHE_TIMEOUT = 300
+FILTERED_COUNT_LIMIT = 10000
+
+
+def estimated_table_count(model, using='default'):
+    """Approximate number of rows in ``model``'s table."""
+    table = model._meta.db_table
+    connection = connections[using]
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table is first analyzed
+        if row and row[0] >= ESTIMATE_THRESHOLD:
+            return row[0]
+        return model._default_manager.using(using).count()
+
+    key = f'table-count:{using}:{table}'
+    count = cache.get(key)
+    if count is None:
+        count = model._default_manager.using(using).count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def is_unfiltered(queryset):
+    """True when ``queryset`` counts the same rows as its whole table."""
+    query = queryset.query
+    return (
+        not query.where
+        and not query.distinct
+        and query.group_by is None
+        and not query.low_mark
+        and query.high_mark is None
+    )
+
+
+class EstimatedCountPage(Page):
+    """Page that knows whether a next page exists without trusting the count."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count never scans a large table."""
+
+    def validate_number(self, number):
+        """Check that ``number`` is a page number, without bounding it by the count."""
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        # Rows seen so far bound the count from below, and fix it on the last page
+        seen = bottom + len(rows) + has_next
+        if not has_next or seen > self.count:
+            self.__dict__['count'] = seen
+            self.__dict__.pop('num_pages', None)
+        return EstimatedCountPage(rows, number, self, has_next)
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if is_unfiltered(queryset):
+            return estimated_table_count(queryset.model, using=queryset.db)
+        return queryset.order_by()[:FILTERED_COUNT_LIMIT].count()
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Opt-in page number pagination with estimated counts.
+
+    Lists stay unpaginated unless the client sends ``page`` or ``page_size``,
+    so existing callers keep receiving plain arrays.
+    """
+    django_paginator_class = EstimatedCountPaginator
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
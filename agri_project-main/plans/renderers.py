@@ -0,0 +1,97 @@
+"""
+Renderers and parsers for the plans REST API.
+
+ORJSONRenderer and ORJSONParser use orjson when it is installed and fall back
+to DRF's stdlib-based JSON classes otherwise, so the output is the same either
+way: values orjson does not handle natively (Decimal, lazy strings, datetimes)
+go through DRF's JSONEncoder, U+2028 and U+2029 are escaped as DRF does, and
+data with NaN or infinite floats, which orjson would write as null, is
+rendered by DRF.
+
+MessagePackRenderer is offered by the bulk data viewsets when msgpack is
+installed, for clients that send ``Accept: application/msgpack`` or
+``?format=msgpack``.
+"""
+import math
+from decimal import Decimal
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _has_non_finite(data):
+    """Whether ``data`` contains a NaN or infinite float or decimal."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, Decimal):
+        return not data.is_finite()
+    if isinstance(data, dict):
+        return any(_has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_non_finite(value) for value in data)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer backed by orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Datetimes are passed through so they keep DRF's millisecond/Z format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # Valid JSON, but not valid JavaScript; DRF escapes them
+        return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser backed by orjson."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack renderer; decimals are packed as their exact string form."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.default, use_bin_type=True, datetime=False)
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return JSONEncoder().default(obj)
@@ -0,0 +1,123 @@
+"""
+Full-text search over the workflow audit log.
+
+Each audit row has an AuditSearchDocument holding its message together with
+the actor and unit names. SQLite searches the FTS5 table kept in sync by
+triggers; PostgreSQL matches against the GIN-indexed tsvector expression.
+Both are created by migration 0005. Other backends fall back to substring
+matching. Renaming a user or unit rewrites the documents that name it.
+"""
+import re
+
+from django.db import connection
+
+from .models import AuditSearchDocument
+
+SQLITE_FTS_TABLE = 'plans_auditsearch_fts'
+
+
+def audit_search_content(audit):
+    """Text indexed for an audit row."""
+    actor = audit.actor
+    parts = [
+        audit.message, actor.username, actor.first_name, actor.last_name,
+        audit.unit.name, audit.action,
+    ]
+    return ' '.join(part for part in parts if part)
+
+
+def index_audit(audit):
+    """Create the search document of a new audit row."""
+    AuditSearchDocument.objects.create(audit=audit, content=audit_search_content(audit))
+
+
+def reindex_audits(audits, batch_size=1000):
+    """Rewrite the search documents of ``audits`` whose indexed text changed.
+
+    Called when an actor or unit is renamed, since documents store the names.
+    """
+    audits = audits.select_related('actor', 'unit', 'search_document').order_by('pk')
+    documents = []
+    for audit in audits.iterator(chunk_size=batch_size):
+        content = audit_search_content(audit)
+        try:
+            document = audit.search_document
+        except AuditSearchDocument.DoesNotExist:
+            AuditSearchDocument.objects.create(audit=audit, content=content)
+            continue
+        if document.content != content:
+            document.content = content
+            documents.append(document)
+    AuditSearchDocument.objects.bulk_update(documents, ['content'], batch_size=batch_size)
+
+
+def search_terms(query):
+    """Word tokens of a user query; punctuation such as '-' in codes splits terms."""
+    return re.findall(r'\w+', query.lower())
+
+
+def _unit_clause(unit_ids, params):
+    if unit_ids is None:
+        return ''
+    params.extend(unit_ids)
+    return f" AND a.unit_id IN ({', '.join(['%s'] * len(unit_ids))})"
+
+
+def _sqlite_search(terms, unit_ids, limit, offset):
+    match = ' '.join('"%s"*' % term for term in terms)
+    params = [match]
+    unit_clause = _unit_clause(unit_ids, params)
+    params.extend([limit, offset])
+    sql = (
+        f"SELECT f.rowid FROM {SQLITE_FTS_TABLE} f"
+        f" JOIN plans_workflowaudit a ON a.id = f.rowid"
+        f" WHERE {SQLITE_FTS_TABLE} MATCH %s{unit_clause}"
+        f" ORDER BY f.rank, a.created_at DESC LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgres_search(terms, unit_ids, limit, offset):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    params = [tsquery]
+    unit_clause = _unit_clause(unit_ids, params)
+    params.extend([limit, offset])
+    sql = (
+        "SELECT d.audit_id FROM plans_auditsearchdocument d"
+        " JOIN plans_workflowaudit a ON a.id = d.audit_id,"
+        " to_tsquery('simple', %s) q"
+        " WHERE to_tsvector('simple', d.content) @@ q" + unit_clause +
+        " ORDER BY ts_rank(to_tsvector('simple', d.content), q) DESC, a.created_at DESC"
+        " LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_search(terms, unit_ids, limit, offset):
+    documents = AuditSearchDocument.objects.all()
+    for term in terms:
+        documents = documents.filter(content__icontains=term)
+    if unit_ids is not None:
+        documents = documents.filter(audit__unit_id__in=unit_ids)
+    documents = documents.order_by('-audit__created_at')
+    return list(documents.values_list('audit_id', flat=True)[offset:offset + limit])
+
+
+def search_audit_ids(query, unit_ids=None, limit=20, offset=0):
+    """Ids of audit rows matching every term of ``query``, best match first.
+
+    ``unit_ids=None`` searches all units.
+    """
+    terms = search_terms(query)
+    if not terms or (unit_ids is not None and not unit_ids):
+        return []
+
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(terms, unit_ids, limit, offset)
+    if connection.vendor == 'postgresql':
+        return _postgres_search(terms, unit_ids, limit, offset)
+    return _fallback_search(terms, unit_ids, limit, offset)
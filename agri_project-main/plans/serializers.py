@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
 from .models import (
     Unit, UserProfile, Indicator, AnnualPlan, AnnualPlanTarget,
     QuarterlyReport, QuarterlyIndicatorEntry, ImportBatch, WorkflowAudit
@@ -10,7 +11,41 @@ from .models import (
 # BASE SERIALIZERS
 # =============================================================================
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Prune the top-level fields to the ``fields`` and ``expand`` sets in the context.
+
+    Nested serializer fields left out of ``expand`` render as their primary key,
+    or are omitted when they are lists. Write-only fields are never pruned.
+    """
+
+    def is_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_root():
+            return fields
+
+        selected = self.context.get('fields')
+        expand = self.context.get('expand')
+
+        for name, field in list(fields.items()):
+            if field.write_only:
+                continue
+            if selected is not None and name not in selected:
+                del fields[name]
+            elif expand is not None and name not in expand and isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer):
+                    del fields[name]
+                else:
+                    source = field.source if field.source not in (None, name) else None
+                    fields[name] = serializers.PrimaryKeyRelatedField(source=source, read_only=True)
+
+        return fields
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """User serializer with basic information."""
     class Meta:
         model = User
@@ -18,7 +53,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Unit serializer with hierarchy support."""
     children_count = serializers.SerializerMethodField()
     users_count = serializers.SerializerMethodField()
@@ -33,10 +68,14 @@ class UnitSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def get_children_count(self, obj):
-        return obj.children.count()
+        # Annotated by Unit.objects.with_counts()
+        count = getattr(obj, 'children_count', None)
+        return obj.children.count() if count is None else count
     
     def get_users_count(self, obj):
-        return obj.users.count()
+        # Annotated by Unit.objects.with_counts()
+        count = getattr(obj, 'users_count', None)
+        return obj.users.count() if count is None else count
 
 
 class UnitNestedSerializer(serializers.ModelSerializer):
@@ -50,7 +89,7 @@ class UnitNestedSerializer(serializers.ModelSerializer):
 # USER PROFILE SERIALIZERS
 # =============================================================================
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """User profile serializer with user and unit details."""
     user = UserSerializer(read_only=True)
     unit = UnitNestedSerializer(read_only=True)
@@ -93,7 +132,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
 # INDICATOR SERIALIZERS
 # =============================================================================
 
-class IndicatorSerializer(serializers.ModelSerializer):
+class IndicatorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Indicator serializer with unit information."""
     owner_unit = UnitNestedSerializer(read_only=True)
     owner_unit_id = serializers.IntegerField(write_only=True, required=False)
@@ -134,7 +173,7 @@ class IndicatorNestedSerializer(serializers.ModelSerializer):
 # ANNUAL PLAN SERIALIZERS
 # =============================================================================
 
-class AnnualPlanTargetSerializer(serializers.ModelSerializer):
+class AnnualPlanTargetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Annual plan target serializer."""
     indicator = IndicatorNestedSerializer(read_only=True)
     indicator_id = serializers.IntegerField(write_only=True)
@@ -164,7 +203,7 @@ class AnnualPlanTargetSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class AnnualPlanSerializer(serializers.ModelSerializer):
+class AnnualPlanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Annual plan serializer with targets and workflow information."""
     unit = UnitNestedSerializer(read_only=True)
     unit_id = serializers.IntegerField(write_only=True, required=False)
@@ -188,13 +227,17 @@ class AnnualPlanSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'submitted_at', 'approved_at', 'created_by']
 
     def get_targets_count(self, obj):
-        return obj.targets.count()
+        # Prefetched on detail paths, annotated by AnnualPlan.objects.for_listing() elsewhere
+        if 'targets' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.targets.all())
+        count = getattr(obj, 'targets_count', None)
+        return obj.targets.count() if count is None else count
 
     def get_can_edit(self, obj):
         return obj.status in ['DRAFT'] and obj.is_within_entry_window()
 
     def get_can_submit(self, obj):
-        return obj.status == 'DRAFT' and obj.targets.exists()
+        return obj.status == 'DRAFT' and self.get_targets_count(obj) > 0
 
     def get_can_approve(self, obj):
         # This would need to be determined by the requesting user's role
@@ -220,7 +263,7 @@ class AnnualPlanSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class AnnualPlanListSerializer(serializers.ModelSerializer):
+class AnnualPlanListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Simplified annual plan serializer for list views."""
     unit = UnitNestedSerializer(read_only=True)
     created_by = UserSerializer(read_only=True)
@@ -234,14 +277,18 @@ class AnnualPlanListSerializer(serializers.ModelSerializer):
         ]
     
     def get_targets_count(self, obj):
-        return obj.targets.count()
+        # Prefetched on detail paths, annotated by AnnualPlan.objects.for_listing() elsewhere
+        if 'targets' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.targets.all())
+        count = getattr(obj, 'targets_count', None)
+        return obj.targets.count() if count is None else count
 
 
 # =============================================================================
 # QUARTERLY REPORT SERIALIZERS
 # =============================================================================
 
-class QuarterlyIndicatorEntrySerializer(serializers.ModelSerializer):
+class QuarterlyIndicatorEntrySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Quarterly indicator entry serializer."""
     indicator = IndicatorNestedSerializer(read_only=True)
     indicator_id = serializers.IntegerField(write_only=True)
@@ -281,7 +328,7 @@ class QuarterlyIndicatorEntrySerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class QuarterlyReportSerializer(serializers.ModelSerializer):
+class QuarterlyReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Quarterly report serializer with entries and workflow information."""
     unit = UnitNestedSerializer(read_only=True)
     unit_id = serializers.IntegerField(write_only=True, required=False)
@@ -306,13 +353,17 @@ class QuarterlyReportSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'submitted_at', 'approved_at', 'created_by']
 
     def get_entries_count(self, obj):
-        return obj.entries.count()
+        # Prefetched on detail paths, annotated by QuarterlyReport.objects.for_listing() elsewhere
+        if 'entries' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.entries.all())
+        count = getattr(obj, 'entries_count', None)
+        return obj.entries.count() if count is None else count
 
     def get_can_edit(self, obj):
         return obj.status in ['DRAFT'] and obj.is_within_entry_window()
 
     def get_can_submit(self, obj):
-        return obj.status == 'DRAFT' and obj.entries.exists()
+        return obj.status == 'DRAFT' and self.get_entries_count(obj) > 0
 
     def get_can_approve(self, obj):
         # This would need to be determined by the requesting user's role
@@ -339,7 +390,7 @@ class QuarterlyReportSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class QuarterlyReportListSerializer(serializers.ModelSerializer):
+class QuarterlyReportListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Simplified quarterly report serializer for list views."""
     unit = UnitNestedSerializer(read_only=True)
     created_by = UserSerializer(read_only=True)
@@ -354,7 +405,11 @@ class QuarterlyReportListSerializer(serializers.ModelSerializer):
         ]
     
     def get_entries_count(self, obj):
-        return obj.entries.count()
+        # Prefetched on detail paths, annotated by QuarterlyReport.objects.for_listing() elsewhere
+        if 'entries' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.entries.all())
+        count = getattr(obj, 'entries_count', None)
+        return obj.entries.count() if count is None else count
 
 
 # =============================================================================
@@ -395,7 +450,7 @@ class ImportBatchSerializer(serializers.ModelSerializer):
 # AUDIT SERIALIZERS
 # =============================================================================
 
-class WorkflowAuditSerializer(serializers.ModelSerializer):
+class WorkflowAuditSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Workflow audit serializer for tracking actions."""
     actor = UserSerializer(read_only=True)
     unit = UnitNestedSerializer(read_only=True)
@@ -407,11 +462,47 @@ class WorkflowAuditSerializer(serializers.ModelSerializer):
         model = WorkflowAudit
         fields = [
             'id', 'actor', 'unit', 'action', 'action_display',
-            'context_plan', 'context_report', 'message', 'created_at'
+            'context_plan', 'context_report', 'message', 'entity_type',
+            'entity_id', 'changes', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
 
 
+class WorkflowAuditFeedSerializer(SparseFieldsMixin, serializers.Serializer):
+    """Flat audit row for activity feeds, read from WorkflowAudit.objects.feed()."""
+    id = serializers.IntegerField()
+    action = serializers.CharField()
+    action_display = serializers.SerializerMethodField()
+    message = serializers.CharField(allow_null=True)
+    created_at = serializers.DateTimeField()
+    actor = serializers.SerializerMethodField()
+    unit = serializers.SerializerMethodField()
+    context_plan_id = serializers.IntegerField(allow_null=True)
+    context_report_id = serializers.IntegerField(allow_null=True)
+    entity_type = serializers.CharField()
+    entity_id = serializers.IntegerField(allow_null=True)
+
+    ACTION_LABELS = dict(WorkflowAudit.ACTION_CHOICES)
+
+    def get_action_display(self, obj):
+        return self.ACTION_LABELS.get(obj['action'], obj['action'])
+
+    def get_actor(self, obj):
+        return {
+            'id': obj['actor_id'],
+            'username': obj['actor__username'],
+            'first_name': obj['actor__first_name'],
+            'last_name': obj['actor__last_name'],
+        }
+
+    def get_unit(self, obj):
+        return {
+            'id': obj['unit_id'],
+            'name': obj['unit__name'],
+            'type': obj['unit__type'],
+        }
+
+
 # =============================================================================
 # DASHBOARD & ANALYTICS SERIALIZERS
 # =============================================================================
@@ -421,6 +512,8 @@ class DashboardStatsSerializer(serializers.Serializer):
     total_units = serializers.IntegerField()
     total_indicators = serializers.IntegerField()
     annual_plans_current = serializers.IntegerField()
+    annual_plans_submitted = serializers.IntegerField()
+    annual_plans_approved = serializers.IntegerField()
     quarterly_reports_current = serializers.IntegerField()
     pending_approvals = serializers.IntegerField()
     recent_activities_count = serializers.IntegerField()
@@ -433,6 +526,8 @@ class PerformanceSummarySerializer(serializers.Serializer):
     approved_plans = serializers.IntegerField()
     total_reports = serializers.IntegerField()
     approved_reports = serializers.IntegerField()
+    plan_approval_rate = serializers.FloatField()
+    report_approval_rate = serializers.FloatField()
     completion_percentage = serializers.FloatField()
 
 
@@ -560,3 +655,83 @@ class QuarterlyReportExportSerializer(serializers.ModelSerializer):
             'id', 'year', 'quarter', 'quarter_display', 'unit_name', 'status',
             'submitted_at', 'approved_at', 'entries'
         ]
+
+
+# =============================================================================
+# FAST READ SERIALIZERS
+# =============================================================================
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+    serializers.IntegerField, serializers.PrimaryKeyRelatedField, serializers.SerializerMethodField,
+)
+
+
+class ValuesSerializer:
+    """Render a serializer's read fields straight from ``values_list()`` rows.
+
+    The columns are derived from ``serializer_class``: model fields and dotted
+    sources become lookups, nested serializers read their own columns, and a
+    SerializerMethodField reads the queryset annotation of the same name. Only
+    the conversions the DRF fields would apply are kept, so the output matches
+    ``serializer_class(queryset, many=True).data``.
+    """
+
+    def __init__(self, serializer_class, context=None):
+        self.columns = []
+        self.build = self.compile(serializer_class(context=context or {}), prefix='')
+
+    def column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return self.columns.index(lookup)
+
+    def compile(self, serializer, prefix):
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, serializers.SerializerMethodField) and not prefix:
+                lookup = name
+            elif isinstance(field, (serializers.ListSerializer, serializers.SerializerMethodField)) or not field.source_attrs:
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{name} cannot be rendered from values() rows.'
+                )
+            else:
+                lookup = prefix + '__'.join(field.source_attrs)
+
+            # DRF skips a dotted source whose intermediate relation is null
+            guard = None
+            if len(field.source_attrs) > 1:
+                guard = self.column(prefix + '__'.join(field.source_attrs[:-1]))
+
+            if isinstance(field, serializers.BaseSerializer):
+                plan.append((name, self.column(lookup), guard, None, self.compile(field, lookup + '__')))
+            else:
+                convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+                plan.append((name, self.column(lookup), guard, convert, None))
+
+        def build(row):
+            data = {}
+            for name, index, guard, convert, nested in plan:
+                if guard is not None and row[guard] is None:
+                    continue
+                value = row[index]
+                if nested is not None:
+                    data[name] = None if value is None else nested(row)
+                elif value is None or convert is None:
+                    data[name] = value
+                else:
+                    data[name] = convert(value)
+            return data
+
+        return build
+
+    def values(self, queryset):
+        """The rows to render, as a ``values_list()`` queryset."""
+        return queryset.values_list(*self.columns)
+
+    def render(self, rows):
+        return [self.build(row) for row in rows]
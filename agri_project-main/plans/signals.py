@@ -0,0 +1,168 @@
+"""
+Signal handlers for the plans app.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .activity import record_activity
+from .authentication import invalidate_token, invalidate_user_tokens
+from .cache import SHARED_OUTPUT, bump_generation, bump_output_generation, output_scope
+from .events import audit_event, broker
+from .models import (
+    AnnualPlan, AnnualPlanTarget, Indicator, QuarterlyIndicatorEntry, QuarterlyReport,
+    Unit, UserProfile, WorkflowAudit
+)
+from .search import index_audit, reindex_audits
+
+
+def invalidate_stats(*unit_ids):
+    """Bump the statistics generation of ``unit_ids`` once the write is committed."""
+    transaction.on_commit(lambda: bump_generation(*unit_ids))
+
+
+def invalidate_output(*scopes):
+    """Bump the output generation of ``scopes`` once the write is committed."""
+    transaction.on_commit(lambda: bump_output_generation(*scopes))
+
+
+def _output_scope_of(instance):
+    """Output generation a plan, report, target, entry, indicator or unit write invalidates."""
+    if isinstance(instance, AnnualPlan):
+        return output_scope('plan', instance.pk)
+    if isinstance(instance, AnnualPlanTarget):
+        return output_scope('plan', instance.plan_id)
+    if isinstance(instance, QuarterlyReport):
+        return output_scope('report', instance.pk)
+    if isinstance(instance, QuarterlyIndicatorEntry):
+        return output_scope('report', instance.report_id)
+    return SHARED_OUTPUT
+
+
+def _unit_of(instance):
+    """Unit whose statistics a plan, report, target, entry, indicator or unit affects."""
+    if isinstance(instance, Unit):
+        return instance.pk
+    if isinstance(instance, Indicator):
+        return instance.owner_unit_id
+    if isinstance(instance, (AnnualPlan, QuarterlyReport)):
+        return instance.unit_id
+    # Targets and entries only name their plan's or report's unit when it is
+    # loaded; deleting a plan or report cascades without loading it for each
+    # row, and the plan or report bumps its own unit.
+    parent = instance._meta.get_field('plan' if isinstance(instance, AnnualPlanTarget) else 'report')
+    if parent.is_cached(instance):
+        return parent.get_cached_value(instance).unit_id
+    return None
+
+
+@receiver(post_save, sender=WorkflowAudit)
+def workflow_audit_saved(sender, instance, created, raw=False, **kwargs):
+    """Roll up, index and publish new audit rows."""
+    if created and not raw:
+        record_activity(instance)
+        index_audit(instance)
+
+        event = audit_event(instance)
+        transaction.on_commit(lambda: broker.publish(event))
+
+
+@receiver(post_delete, sender=WorkflowAudit)
+def workflow_audit_deleted(sender, instance, **kwargs):
+    """Remove deleted audit rows from the daily activity rollup."""
+    record_activity(instance, delta=-1)
+
+
+# Fields of users and units that appear in audit search documents
+INDEXED_NAMES = {
+    User: ('username', 'first_name', 'last_name'),
+    Unit: ('name',),
+}
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Unit)
+def indexed_names_changing(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Note on the instance whether a save changes a name in the audit search index."""
+    names = INDEXED_NAMES[sender]
+    instance._renamed = False
+    # Logins save only last_login and skip the lookup
+    if raw or instance._state.adding or (update_fields is not None and not set(names) & set(update_fields)):
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(*names).first()
+    instance._renamed = stored is not None and any(stored[name] != getattr(instance, name) for name in names)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    """Reindex the audit rows of a renamed user."""
+    if instance.__dict__.pop('_renamed', False):
+        reindex_audits(WorkflowAudit.objects.filter(actor=instance))
+
+
+@receiver(post_save, sender=Unit)
+def unit_saved(sender, instance, **kwargs):
+    """Reindex the audit rows of a renamed unit."""
+    if instance.__dict__.pop('_renamed', False):
+        reindex_audits(WorkflowAudit.objects.filter(unit=instance))
+
+
+@receiver(post_save, sender=Unit)
+@receiver(post_save, sender=Indicator)
+@receiver(post_save, sender=AnnualPlan)
+@receiver(post_save, sender=QuarterlyReport)
+@receiver(post_save, sender=AnnualPlanTarget)
+@receiver(post_save, sender=QuarterlyIndicatorEntry)
+def statistics_source_saved(sender, instance, raw=False, **kwargs):
+    """Invalidate cached statistics and output a plan or report write touches."""
+    if not raw:
+        invalidate_stats(_unit_of(instance))
+        invalidate_output(_output_scope_of(instance))
+
+
+@receiver(post_delete, sender=Unit)
+@receiver(post_delete, sender=Indicator)
+@receiver(post_delete, sender=AnnualPlan)
+@receiver(post_delete, sender=QuarterlyReport)
+@receiver(post_delete, sender=AnnualPlanTarget)
+@receiver(post_delete, sender=QuarterlyIndicatorEntry)
+def statistics_source_deleted(sender, instance, **kwargs):
+    """Invalidate cached statistics and output a plan or report delete touches."""
+    invalidate_stats(_unit_of(instance))
+    invalidate_output(_output_scope_of(instance))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    """Drop the cached authentication of a changed or deleted token."""
+    # A deleted token's key (its primary key) is cleared before the commit
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def token_user_changed(sender, instance, **kwargs):
+    """Drop the cached authentication of a user whose account or profile changed.
+
+    Covers password changes, deactivation and role or unit updates.
+    """
+    user_id = instance.pk if isinstance(instance, User) else instance.user_id
+    transaction.on_commit(lambda: invalidate_user_tokens(user_id))
+
+
+@receiver(post_save, sender=Unit)
+@receiver(pre_delete, sender=Unit)
+def token_unit_changed(sender, instance, created=False, **kwargs):
+    """Drop the cached authentication of the members of a changed or deleted unit."""
+    if created:
+        return
+    # Before a delete, while the profiles still point at the unit
+    user_ids = list(UserProfile.objects.filter(unit=instance).values_list('user_id', flat=True))
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_user_tokens(*user_ids))
@@ -0,0 +1,181 @@
+"""
+Plan and report counts for the dashboard and performance summaries.
+
+Each table is counted in one query with conditional aggregates, one COUNT
+per status, rather than one COUNT query per status. The ``current_*`` and
+``*_summary`` functions return the statistics through the versioned cache
+(plans.cache); views and the cache warm-up both use them, so they share keys.
+Action counts come from the activity rollup and are not cached, so audit
+rows do not invalidate the cached statistics.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .activity import actions_since, actions_this_month
+from .cache import ALL_UNITS, cached_stats
+from .models import AnnualPlan, QuarterlyIndicatorEntry, QuarterlyReport, Unit
+
+STATUSES = [status for status, _ in AnnualPlan.STATUS_CHOICES]
+
+# Window of the dashboard's recent activity count
+RECENT_ACTIVITY_DAYS = 30
+
+
+def status_counts(queryset, **conditions):
+    """``total`` and per-status counts (``draft``, ``submitted``, ...) of ``queryset`` in one query.
+
+    Extra keyword arguments add counts restricted by the given ``Q`` filter.
+    """
+    aggregates = {'total': Count('id')}
+    for status in STATUSES:
+        aggregates[status.lower()] = Count('id', filter=Q(status=status))
+    for name, condition in conditions.items():
+        aggregates[name] = Count('id', filter=condition)
+    return queryset.aggregate(**aggregates)
+
+
+def approval_rate(approved, total):
+    """Percentage of ``total`` that is approved."""
+    return (approved / total) * 100 if total else 0
+
+
+def for_units(queryset, unit_ids, field='unit'):
+    """Restrict ``queryset`` to the units ``unit_ids``; None means all units."""
+    if unit_ids is None:
+        return queryset
+    return queryset.filter(**{f'{field}__in': unit_ids})
+
+
+def performance_stats(unit_ids, year):
+    """Status counts and approval rates of the plans and reports of ``unit_ids`` in ``year``."""
+    plans = status_counts(for_units(AnnualPlan.objects.filter(year=year), unit_ids))
+    reports = status_counts(for_units(QuarterlyReport.objects.filter(year=year), unit_ids))
+
+    stats = {'year': year, 'total_plans': plans['total'], 'total_reports': reports['total']}
+    for status in STATUSES:
+        stats[f'{status.lower()}_plans'] = plans[status.lower()]
+        stats[f'{status.lower()}_reports'] = reports[status.lower()]
+
+    stats['plan_approval_rate'] = approval_rate(plans['approved'], plans['total'])
+    stats['report_approval_rate'] = approval_rate(reports['approved'], reports['total'])
+    stats['completion_percentage'] = approval_rate(
+        plans['approved'] + reports['approved'],
+        plans['total'] + reports['total']
+    )
+    return stats
+
+
+def dashboard_stats(unit_ids, year, quarter):
+    """Headline counts of the dashboard for ``unit_ids`` (None for all); one query per table."""
+    totals = for_units(Unit.objects.all(), unit_ids, 'id').aggregate(
+        total_units=Count('id', distinct=True),
+        total_indicators=Count('indicators', distinct=True)
+    )
+    plans = status_counts(
+        for_units(AnnualPlan.objects.all(), unit_ids),
+        current=Q(year=year),
+        submitted_current=Q(year=year, status='SUBMITTED'),
+        approved_current=Q(year=year, status='APPROVED')
+    )
+    reports_current = for_units(QuarterlyReport.objects.filter(year=year, quarter=quarter), unit_ids).count()
+
+    return {
+        'total_units': totals['total_units'],
+        'total_indicators': totals['total_indicators'],
+        'annual_plans_current': plans['current'],
+        'annual_plans_submitted': plans['submitted_current'],
+        'annual_plans_approved': plans['approved_current'],
+        'quarterly_reports_current': reports_current,
+        # Submitted plans of any year, as listed by the pending approvals endpoint
+        'pending_approvals': plans['submitted'],
+    }
+
+
+def unit_statistics(unit, year):
+    """Active indicators, plans, reports and pending approvals of ``unit`` in ``year``."""
+    plans = unit.annual_plans.aggregate(
+        total=Count('id', filter=Q(year=year)),
+        pending=Count('id', filter=Q(year=year, status='SUBMITTED'))
+    )
+    return {
+        'indicators_count': unit.indicators.filter(active=True).count(),
+        'annual_plans_count': plans['total'],
+        'quarterly_reports_count': unit.quarterly_reports.filter(year=year).count(),
+        'pending_approvals': plans['pending'],
+    }
+
+
+def plan_progress(plan):
+    """Targets of ``plan`` against the entries reported by its unit for its year."""
+    total_targets = plan.targets.count()
+    completed_entries = QuarterlyIndicatorEntry.objects.filter(
+        report__unit=plan.unit_id,
+        report__year=plan.year
+    ).count()
+    return {
+        'total_targets': total_targets,
+        'completed_entries': completed_entries,
+        'completion_percentage': (completed_entries / total_targets * 100) if total_targets > 0 else 0
+    }
+
+
+def scope_unit_ids(scope):
+    """Unit ids of a cache scope (see AccessContext.stats_scope); None for all units."""
+    return None if scope == ALL_UNITS else [scope]
+
+
+def current_quarter():
+    """``(year, quarter)`` of today."""
+    today = timezone.localdate()
+    return today.year, (today.month - 1) // 3 + 1
+
+
+def current_dashboard_stats(scope):
+    """Dashboard statistics of ``scope`` for the current quarter.
+
+    The recent activity count is read from the rollup on every call rather
+    than cached: audit rows are written on each login and logout, and
+    invalidating the counts that often would leave them cold.
+    """
+    year, quarter = current_quarter()
+    stats = cached_stats(
+        'dashboard', scope,
+        lambda: dashboard_stats(scope_unit_ids(scope), year, quarter),
+        year, quarter
+    )
+    return {
+        **stats,
+        'recent_activities_count': actions_since(
+            scope_unit_ids(scope), timezone.localdate() - timedelta(days=RECENT_ACTIVITY_DAYS - 1)
+        ),
+    }
+
+
+def performance_summary(scope, year):
+    """Performance statistics of ``scope`` in ``year``."""
+    return cached_stats('performance', scope, lambda: performance_stats(scope_unit_ids(scope), year), year)
+
+
+def unit_performance_summary(unit, year):
+    """Performance statistics of ``unit`` in ``year`` with its actions this month.
+
+    As on the dashboard, the action count is read from the rollup on every call.
+    """
+    stats = cached_stats(
+        'unit_performance', unit.id,
+        lambda: {'unit_name': unit.name, **performance_stats([unit.id], year)},
+        year
+    )
+    return {**stats, 'actions_this_month': actions_this_month([unit.id])}
+
+
+def unit_statistics_summary(unit, year):
+    """Counts of ``unit`` in ``year`` shown on the unit page."""
+    return cached_stats('unit_statistics', unit.id, lambda: unit_statistics(unit, year), year)
+
+
+def plan_progress_summary(plan):
+    """Progress of ``plan`` against its unit's quarterly entries."""
+    return cached_stats('plan_progress', plan.unit_id, lambda: plan_progress(plan), plan.id)
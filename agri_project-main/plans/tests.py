@@ -1,3 +1,1116 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import gzip
+import importlib.util
+import io
+import os
+import runpy
+import tempfile
+import uuid
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.management import CommandError, call_command
+from django.core.paginator import EmptyPage
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .access import get_access_context
+from .authentication import CachedTokenAuthentication, _token_cache_key
+from .cache_backends import FileBasedCache, RedisCache
+from .activity import activity_histogram, record_activity
+from .cache import cached_stats, single_flight
+from .middleware import CompressionMiddleware, brotli
+from .pagination import EstimatedCountPaginator
+from .renderers import ORJSONParser, ORJSONRenderer, msgpack
+from .search import search_audit_ids
+from .serializers import IndicatorSerializer, UnitSerializer, ValuesSerializer, WorkflowAuditFeedSerializer
+from .events import ActivityBroker, audit_event
+from .models import (
+    AnnualPlan, AnnualPlanTarget, AuditActivityRollup, Indicator, QuarterlyIndicatorEntry,
+    QuarterlyReport, Unit, UserProfile, WorkflowAudit
+)
+from .views.events import _missed_events, issue_stream_ticket, redeem_stream_ticket
+from .warmup import warm_stats
+
+
+class RedisClientStub(BaseLocMemCache):
+    """In-memory stand-in for Django's RedisCacheClient, which needs the redis package.
+
+    ``server`` plays the redis client returned by get_client().
+    """
+
+    class _lib:
+        class ResponseError(Exception):
+            pass
+
+    def __init__(self, info=None):
+        super().__init__(f'redis-stub-{uuid.uuid4()}', {})
+        self.server = mock.Mock()
+        self.server.dbsize.side_effect = lambda: len(self._cache)
+        if info is None:
+            # Like servers that disable INFO
+            self.server.info.side_effect = self._lib.ResponseError('unknown command INFO')
+        else:
+            self.server.info.return_value = info
+
+    def get_client(self, key=None, *, write=False):
+        return self.server
+
+
+class AdminTestCase(TestCase):
+    """A Strategic Affairs unit with a superadmin, ``admin``, and an API client.
+
+    The cache is cleared first, so cached statistics and tokens do not leak
+    between tests.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.unit = Unit.objects.create(name='Strategic Affairs', type='STRATEGIC')
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'password', first_name='Abebe')
+        UserProfile.objects.create(user=self.admin, role='SUPERADMIN', unit=self.unit)
+        self.client = APIClient()
+
+    def authenticate(self):
+        """Authenticate the client as a fresh admin instance, so the profile is fetched as on a real request."""
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+
+
+class UnitListQueryTests(AdminTestCase):
+    """The units list renders counts and parent names without per-unit queries."""
+
+    def add_units(self, count):
+        for index in range(count):
+            unit = Unit.objects.create(
+                name=f'Office {Unit.objects.count()}',
+                type='STATE_MINISTER',
+                parent=self.unit
+            )
+            user = User.objects.create_user(f'user{unit.id}', f'user{unit.id}@example.com', 'password')
+            UserProfile.objects.create(user=user, role='STATE_MINISTER', unit=unit)
+
+    def authenticate(self):
+        # A fresh user instance, so the profile is fetched as on a real request
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+
+    def test_units_list_query_count_is_constant(self):
+        self.add_units(3)
+        # One query for the requesting user's profile, one for the units
+        self.authenticate()
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/units/')
+        self.assertEqual(len(response.json()), 4)
+
+        self.add_units(20)
+        self.authenticate()
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/units/')
+        self.assertEqual(len(response.json()), 24)
+
+    def test_units_list_counts(self):
+        self.add_units(2)
+        self.authenticate()
+        response = self.client.get('/api/units/')
+        units = {unit['name']: unit for unit in response.json()}
+
+        self.assertEqual(units['Strategic Affairs']['children_count'], 2)
+        self.assertEqual(units['Strategic Affairs']['users_count'], 1)
+        self.assertEqual(units['Office 1']['parent_name'], 'Strategic Affairs')
+        self.assertEqual(units['Office 1']['children_count'], 0)
+        self.assertEqual(units['Office 1']['users_count'], 1)
+
+
+class DetailQueryTests(AdminTestCase):
+    """Plan and report detail views render nested rows from a single prefetch."""
+
+    def setUp(self):
+        super().setUp()
+        self.year = timezone.now().year
+        self.indicators = Indicator.objects.bulk_create([
+            Indicator(code=f'IND-{index}', name=f'Indicator {index}', owner_unit=self.unit)
+            for index in range(200)
+        ])
+        self.authenticate()
+
+    def test_report_detail_query_count(self):
+        report = QuarterlyReport.objects.create(
+            year=self.year, quarter=1, unit=self.unit, created_by=self.admin
+        )
+        QuarterlyIndicatorEntry.objects.bulk_create([
+            QuarterlyIndicatorEntry(
+                report=report, indicator=indicator, achieved_value=index, updated_by=self.admin
+            )
+            for index, indicator in enumerate(self.indicators)
+        ])
+
+        # Profile, report, entries with their indicators and editors
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/quarterly-reports/{report.id}/')
+        data = response.json()
+        self.assertEqual(len(data['entries']), 200)
+        self.assertEqual(data['entries_count'], 200)
+        self.assertTrue(data['can_submit'])
+
+    def test_plan_detail_query_count(self):
+        plan = AnnualPlan.objects.create(year=self.year, unit=self.unit, created_by=self.admin)
+        AnnualPlanTarget.objects.bulk_create([
+            AnnualPlanTarget(plan=plan, indicator=indicator, target_value=index)
+            for index, indicator in enumerate(self.indicators)
+        ])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/annual-plans/{plan.id}/')
+        data = response.json()
+        self.assertEqual(len(data['targets']), 200)
+        self.assertEqual(data['targets_count'], 200)
+        self.assertTrue(data['can_submit'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+    def test_approved_plan_detail_is_served_from_the_cache(self):
+        cache.clear()
+        plan = AnnualPlan.objects.create(
+            year=self.year, unit=self.unit, created_by=self.admin,
+            status='APPROVED', approved_at=timezone.now()
+        )
+        AnnualPlanTarget.objects.bulk_create([
+            AnnualPlanTarget(plan=plan, indicator=indicator, target_value=index)
+            for index, indicator in enumerate(self.indicators)
+        ])
+        rendered = self.client.get(f'/api/annual-plans/{plan.id}/').content
+
+        # Profile and the access and approval check
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/annual-plans/{plan.id}/')
+        self.assertEqual(response.content, rendered)
+
+        target = plan.targets.first()
+        target.target_value = 12345
+        with self.captureOnCommitCallbacks(execute=True):
+            target.save()
+        self.assertIn(b'12345', self.client.get(f'/api/annual-plans/{plan.id}/').content)
+
+
+class ValuesSerializerTests(TestCase):
+    """Lists rendered from values() rows match the DRF serializers they stand in for."""
+
+    def setUp(self):
+        self.root = Unit.objects.create(name='Strategic Affairs', type='STRATEGIC')
+        self.office = Unit.objects.create(name='Office', type='STATE_MINISTER', parent=self.root)
+        user = User.objects.create_user('officer', 'officer@example.com', 'password')
+        UserProfile.objects.create(user=user, role='STATE_MINISTER', unit=self.office)
+        Indicator.objects.create(
+            code='IND-1', name='Yield', description='Tonnes per hectare', owner_unit=self.office,
+            unit_of_measure='t/ha'
+        )
+        Indicator.objects.create(code='IND-2', name='Coverage', owner_unit=self.root, active=False)
+
+    def assertRendersLikeSerializer(self, serializer_class, queryset, fields=None, expand=None):
+        context = {'fields': fields, 'expand': expand}
+        values = ValuesSerializer(serializer_class, context=context)
+        expected = serializer_class(queryset, many=True, context=context).data
+        self.assertEqual(values.render(values.values(queryset)), expected)
+
+    def test_units(self):
+        units = Unit.objects.with_counts()
+        self.assertRendersLikeSerializer(UnitSerializer, units)
+        self.assertRendersLikeSerializer(UnitSerializer, units, fields={'id', 'parent', 'parent_name'})
+
+    def test_indicators(self):
+        indicators = Indicator.objects.select_related('owner_unit')
+        self.assertRendersLikeSerializer(IndicatorSerializer, indicators)
+        self.assertRendersLikeSerializer(IndicatorSerializer, indicators, fields={'id', 'code', 'owner_unit'})
+        self.assertRendersLikeSerializer(IndicatorSerializer, indicators, fields={'id', 'owner_unit'}, expand=set())
+        self.assertRendersLikeSerializer(
+            IndicatorSerializer, Indicator.objects.filter(owner_unit=self.office, active=True)
+        )
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """orjson output is byte for byte what DRF's JSONRenderer produces."""
+
+    data = {
+        'created_at': datetime(2026, 3, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'day': date(2026, 3, 1),
+        'target_value': Decimal('12.5000'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Draft'),
+        'rows': [{'name': 'Ambo', 'active': True, 'parent': None}],
+        'title': 'Line\u2028separator\u2029paragraph',
+        1: 'non-string key',
+    }
+
+    def test_output_matches_drf(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_non_finite_floats_match_drf(self):
+        for value in (float('nan'), float('inf'), -float('inf'), Decimal('NaN')):
+            data = {'rows': [{'rate': value}]}
+            with self.subTest(value=value):
+                # Strict JSON (DRF's default) rejects them rather than writing null
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render(data)
+
+    def test_stdlib_fallback(self):
+        with mock.patch('plans.renderers.orjson', None):
+            content = ORJSONRenderer().render(self.data)
+            self.assertEqual(content, JSONRenderer().render(self.data))
+            parsed = ORJSONParser().parse(io.BytesIO(content))
+        self.assertEqual(parsed['rows'], self.data['rows'])
+        self.assertEqual(parsed['label'], 'Draft')
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackTests(AdminTestCase):
+    """Target and entry lists are offered as MessagePack with the same content as JSON."""
+
+    def setUp(self):
+        super().setUp()
+        year = timezone.now().year
+        plan = AnnualPlan.objects.create(year=year, unit=self.unit, created_by=self.admin)
+        report = QuarterlyReport.objects.create(year=year, quarter=1, unit=self.unit, created_by=self.admin)
+        for index in range(3):
+            indicator = Indicator.objects.create(code=f'IND-{index}', name=f'Indicator {index}', owner_unit=self.unit)
+            AnnualPlanTarget.objects.create(
+                plan=plan, indicator=indicator, target_value=Decimal('10.25') * index, remarks=f'Target {index}'
+            )
+            QuarterlyIndicatorEntry.objects.create(
+                report=report, indicator=indicator, achieved_value=index, updated_by=self.admin
+            )
+        self.client.force_authenticate(self.admin)
+
+    def test_lists_round_trip(self):
+        for path in ('/api/annual-plan-targets/', '/api/quarterly-entries/'):
+            expected = self.client.get(path).json()
+            self.assertEqual(len(expected), 3)
+
+            response = self.client.get(path, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(response['Content-Type'], 'application/msgpack')
+            self.assertEqual(msgpack.unpackb(response.content), expected)
+
+            response = self.client.get(path, {'format': 'msgpack'})
+            self.assertEqual(msgpack.unpackb(response.content), expected)
+
+    def test_negotiation(self):
+        response = self.client.get('/api/annual-plan-targets/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        # Only the bulk data endpoints offer MessagePack
+        self.assertEqual(self.client.get('/api/units/', HTTP_ACCEPT='application/msgpack').status_code, 406)
+
+
+@skipIf(brotli is None, 'brotli is not installed')
+@override_settings(COMPRESSION_MIN_LENGTH=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Responses are compressed with the best accepted encoding and a padded header."""
+
+    body = b'{"indicator": "Crop yield", "target_value": "12.5000"}' * 100
+
+    def respond(self, accept_encoding, response=None):
+        request = RequestFactory().get('/api/indicators/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = response or HttpResponse(self.body, content_type='application/json')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def decompress(self, response):
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        encoding = response.get('Content-Encoding')
+        if encoding == 'br':
+            return brotli.decompress(content)
+        return gzip.decompress(content) if encoding == 'gzip' else content
+
+    def test_negotiation(self):
+        for accept_encoding, encoding in [
+            ('gzip, deflate, br', 'br'), ('gzip', 'gzip'), ('br;q=0, gzip', 'gzip'), ('identity', None),
+        ]:
+            response = self.respond(accept_encoding)
+            self.assertEqual(response.get('Content-Encoding'), encoding)
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(self.decompress(response), self.body)
+            if encoding:
+                self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_small_and_binary_bodies_are_sent_as_they_are(self):
+        small = self.respond('br', HttpResponse(b'{"id": 1}', content_type='application/json'))
+        binary = self.respond('br', HttpResponse(self.body, content_type='application/octet-stream'))
+        for response in (small, binary):
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertFalse(response.has_header('Vary'))
+
+    def test_streaming_bodies(self):
+        for encoding in ('br', 'gzip'):
+            response = self.respond(encoding, StreamingHttpResponse(iter([self.body] * 3)))
+            self.assertEqual(response['Content-Encoding'], encoding)
+            self.assertFalse(response.has_header('Content-Length'))
+            self.assertEqual(self.decompress(response), self.body * 3)
+
+    def test_length_is_padded(self):
+        for encoding in ('br', 'gzip'):
+            responses = [self.respond(encoding) for _ in range(10)]
+            self.assertGreater(len({len(response.content) for response in responses}), 1)
+            for response in responses:
+                self.assertEqual(self.decompress(response), self.body)
+
+
+class PlanListQueryTests(AdminTestCase):
+    """Plan listings take a fixed number of queries however many plans they show."""
+
+    def setUp(self):
+        super().setUp()
+        self.year = timezone.now().year
+        units = Unit.objects.bulk_create([
+            Unit(name=f'Office {index}', type='STATE_MINISTER', parent=self.unit) for index in range(500)
+        ])
+        plans = AnnualPlan.objects.bulk_create([
+            AnnualPlan(year=self.year, unit=unit, created_by=self.admin, status='SUBMITTED') for unit in units
+        ])
+        indicators = Indicator.objects.bulk_create([
+            Indicator(code=f'IND-{index}', name=f'Indicator {index}', owner_unit=self.unit) for index in range(2)
+        ])
+        AnnualPlanTarget.objects.bulk_create([
+            AnnualPlanTarget(plan=plan, indicator=indicator, target_value=1)
+            for plan in plans for indicator in indicators
+        ])
+        self.authenticate()
+
+    def test_plan_list_query_count(self):
+        # Profile and plans with their target counts
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/annual-plans/', {'fields': 'id,unit,status,targets_count'})
+        self.assertEqual(len(response.json()), 500)
+        self.assertEqual(response.json()[0]['targets_count'], 2)
+
+        # Plus one prefetch of the targets with their indicators
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/annual-plans/')
+        self.assertEqual(len(response.json()), 500)
+        self.assertEqual(response.json()[0]['targets'][0]['indicator']['code'], 'IND-0')
+
+    def test_pending_approvals_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/dashboard/pending_approvals/')
+        self.assertEqual(len(response.json()), 5)
+
+
+class SparseFieldsTests(AdminTestCase):
+    """?fields= and ?expand= prune both the payload and the queries behind it."""
+
+    def setUp(self):
+        super().setUp()
+        plan = AnnualPlan.objects.create(year=timezone.now().year, unit=self.unit, created_by=self.admin)
+        indicator = Indicator.objects.create(
+            code='IND-1', name='Indicator', description='Tonnes per hectare', owner_unit=self.unit
+        )
+        AnnualPlanTarget.objects.create(plan=plan, indicator=indicator, target_value=10, remarks='Rain fed')
+        self.authenticate()
+
+    def get_plans(self, query):
+        return self.client.get(f'/api/annual-plans/{query}')
+
+    def test_fields_limit_payload_and_queries(self):
+        # Profile and plans only: no targets prefetch, no count annotation join
+        with self.assertNumQueries(2):
+            response = self.get_plans('?fields=id,status')
+        self.assertEqual(response.json(), [{'id': response.json()[0]['id'], 'status': 'DRAFT'}])
+
+    def test_unexpanded_relations_render_as_ids(self):
+        response = self.get_plans('?fields=id,unit,targets,targets_count&expand=')
+        plan = response.json()[0]
+        self.assertEqual(plan['unit'], self.unit.id)
+        self.assertNotIn('targets', plan)
+        self.assertEqual(plan['targets_count'], 1)
+
+    def test_lists_render_text_fields(self):
+        self.assertEqual(self.client.get('/api/indicators/').json()[0]['description'], 'Tonnes per hectare')
+        self.assertEqual(self.client.get('/api/annual-plan-targets/').json()[0]['remarks'], 'Rain fed')
+        self.assertNotIn('description', self.client.get('/api/indicators/?fields=id,code').json()[0])
+
+    def test_writes_are_not_pruned(self):
+        response = self.client.patch(
+            f'/api/units/{self.unit.id}/?fields=id', {'name': 'Strategic Planning'}, format='json'
+        )
+        self.assertEqual(response.json()['name'], 'Strategic Planning')
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.name, 'Strategic Planning')
+
+
+class ActivityRollupTests(AdminTestCase):
+    """Audit rows are counted into daily per-unit buckets that feed the activity chart."""
+
+    def log(self, action='UPDATE'):
+        return WorkflowAudit.objects.create(actor=self.admin, unit=self.unit, action=action)
+
+    def bucket(self, action='UPDATE'):
+        return AuditActivityRollup.objects.get(unit=self.unit, action=action)
+
+    def test_rows_are_counted_into_one_bucket(self):
+        audit = self.log()
+        self.log()
+        self.log('CREATE')
+        self.assertEqual(self.bucket().count, 2)
+        self.assertEqual(self.bucket('CREATE').count, 1)
+
+        audit.delete()
+        self.assertEqual(self.bucket().count, 1)
+
+    def test_concurrently_created_bucket_is_updated(self):
+        audit = self.log()
+        update = QuerySet.update
+        calls = []
+
+        def racing_update(queryset, **kwargs):
+            # The first update misses, as if another request had not yet committed the bucket
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            record_activity(audit)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.bucket().count, 2)
+
+    def test_histogram(self):
+        self.log()
+        self.log('CREATE')
+        other = Unit.objects.create(name='Office', type='STATE_MINISTER', parent=self.unit)
+        WorkflowAudit.objects.create(actor=self.admin, unit=other, action='UPDATE')
+
+        today = timezone.localdate()
+        self.assertEqual(activity_histogram([self.unit.id], days=1), [
+            {'day': today, 'action': 'CREATE', 'actions': 1},
+            {'day': today, 'action': 'UPDATE', 'actions': 1},
+        ])
+        self.assertEqual(sum(row['actions'] for row in activity_histogram(None)), 3)
+
+    def test_days_are_bounded(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for path in ('/api/dashboard/activity/', '/api/audit/activity/'):
+            self.assertEqual(client.get(path, {'days': 1000000}).status_code, 400)
+            self.assertEqual(client.get(path, {'days': 0}).status_code, 400)
+            self.assertEqual(client.get(path, {'days': 30}).status_code, 200)
+
+
+class ActivityFeedTests(AdminTestCase):
+    """Recent activity is rendered from flat rows in one query."""
+
+    def setUp(self):
+        super().setUp()
+        self.plan = AnnualPlan.objects.create(year=timezone.now().year, unit=self.unit, created_by=self.admin)
+        self.audit = WorkflowAudit.objects.create(
+            actor=self.admin, unit=self.unit, action='SUBMIT', context_plan=self.plan,
+            message='Submitted annual plan', entity_type='annualplan', entity_id=self.plan.id
+        )
+
+    def test_feed_payload(self):
+        data = WorkflowAuditFeedSerializer(WorkflowAudit.objects.feed().get(pk=self.audit.pk)).data
+        self.assertEqual(data, {
+            'id': self.audit.id,
+            'action': 'SUBMIT',
+            'action_display': 'Submit',
+            'message': 'Submitted annual plan',
+            'created_at': WorkflowAuditFeedSerializer().fields['created_at'].to_representation(self.audit.created_at),
+            'actor': {'id': self.admin.id, 'username': 'admin', 'first_name': 'Abebe', 'last_name': ''},
+            'unit': {'id': self.unit.id, 'name': 'Strategic Affairs', 'type': 'STRATEGIC'},
+            'context_plan_id': self.plan.id,
+            'context_report_id': None,
+            'entity_type': 'annualplan',
+            'entity_id': self.plan.id,
+        })
+
+    def test_recent_activities_query_count(self):
+        for _ in range(20):
+            WorkflowAudit.objects.create(actor=self.admin, unit=self.unit, action='UPDATE')
+        client = APIClient()
+        for path in ('/api/dashboard/recent_activities/', '/api/audit/recent_activities/'):
+            client.force_authenticate(User.objects.get(pk=self.admin.pk))
+            # Profile and the feed rows with actor and unit names
+            with self.assertNumQueries(2):
+                response = client.get(path)
+            self.assertEqual(len(response.json()), 10)
+
+
+class AuditHistoryTests(AdminTestCase):
+    """An object's change history outlives the object."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def test_history_of_deleted_plan(self):
+        plan = AnnualPlan.objects.create(year=timezone.now().year, unit=self.unit, created_by=self.admin)
+        WorkflowAudit.objects.create(
+            actor=self.admin, unit=self.unit, action='CREATE', context_plan=plan,
+            entity_type='annualplan', entity_id=plan.id
+        )
+        self.assertEqual(self.client.delete(f'/api/annual-plans/{plan.id}/').status_code, 204)
+
+        response = self.client.get('/api/audit/history/', {'entity_type': 'annualplan', 'entity_id': plan.id})
+        self.assertEqual([row['action'] for row in response.json()], ['DELETE', 'CREATE'])
+        self.assertFalse(WorkflowAudit.objects.filter(context_plan__isnull=False).exists())
+
+    def test_entity_id_must_be_an_integer(self):
+        response = self.client.get('/api/audit/history/', {'entity_type': 'annualplan', 'entity_id': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AuditSearchTests(AdminTestCase):
+    """Audit search matches messages and names within the accessible units."""
+
+    def setUp(self):
+        super().setUp()
+        self.office = Unit.objects.create(name='Irrigation Office', type='STATE_MINISTER', parent=self.unit)
+        self.officer = User.objects.create_user('officer', 'officer@example.com', 'password')
+        UserProfile.objects.create(user=self.officer, role='STATE_MINISTER', unit=self.office)
+        for index in range(3):
+            WorkflowAudit.objects.create(
+                actor=self.admin, unit=self.office, action='UPDATE', message=f'Updated target IND-{index}'
+            )
+        WorkflowAudit.objects.create(actor=self.admin, unit=self.unit, action='UPDATE', message='Updated target IND-9')
+
+    def search(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/audit/search/', params)
+
+    def test_terms_match_messages_and_names(self):
+        self.assertEqual(len(self.search(self.admin, q='target').json()['results']), 4)
+        # Prefix match on the actor's first name, code split on punctuation
+        self.assertEqual(len(self.search(self.admin, q='abe ind 9').json()['results']), 1)
+        self.assertEqual(len(self.search(self.admin, q='irrigation').json()['results']), 3)
+
+    def test_results_are_limited_to_accessible_units(self):
+        results = self.search(self.officer, q='target').json()['results']
+        self.assertEqual({row['unit']['id'] for row in results}, {self.office.id})
+
+    def test_user_without_unit_finds_nothing(self):
+        user = User.objects.create_user('unassigned', 'unassigned@example.com', 'password')
+        UserProfile.objects.create(user=user, role='STATE_MINISTER')
+        # No unit filter is built, so no empty IN () reaches the database
+        with self.assertNumQueries(0):
+            self.assertEqual(search_audit_ids('target', frozenset()), [])
+        response = self.search(User.objects.get(pk=user.pk), q='target')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_pagination(self):
+        first = self.search(self.admin, q='target', page_size=3).json()
+        second = self.search(self.admin, q='target', page_size=3, page=2).json()
+        self.assertTrue(first['has_next'])
+        self.assertFalse(second['has_next'])
+        self.assertEqual(len(first['results']) + len(second['results']), 4)
+        self.assertEqual(self.search(self.admin, q='target', page=0).status_code, 400)
+
+    def test_renames_are_reindexed(self):
+        self.office.name = 'Livestock Office'
+        self.office.save()
+        self.admin.first_name = 'Chaltu'
+        self.admin.save()
+        self.assertEqual(len(self.search(self.admin, q='livestock chaltu').json()['results']), 3)
+        self.assertEqual(self.search(self.admin, q='irrigation').json()['results'], [])
+
+    def test_saves_without_renames_are_not_reindexed(self):
+        self.admin.email = 'abebe@example.com'
+        self.office.type = 'STRATEGIC'
+        with mock.patch('plans.signals.reindex_audits') as reindex_audits:
+            self.admin.save()
+            self.office.save()
+            self.admin.save(update_fields=['last_login'])
+        reindex_audits.assert_not_called()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class EstimatedCountPaginatorTests(TestCase):
+    """Pages past a capped or stale count are still served."""
+
+    def setUp(self):
+        cache.clear()
+        self.unit = Unit.objects.create(name='Strategic Affairs', type='STRATEGIC')
+        self.add_indicators(7)
+
+    def add_indicators(self, count):
+        start = Indicator.objects.count()
+        Indicator.objects.bulk_create([
+            Indicator(code=f'IND-{index}', name=f'Indicator {index}', owner_unit=self.unit)
+            for index in range(start, start + count)
+        ])
+
+    def test_filtered_count_limit(self):
+        queryset = Indicator.objects.filter(owner_unit=self.unit).order_by('id')
+        with mock.patch('plans.pagination.FILTERED_COUNT_LIMIT', 4):
+            paginator = EstimatedCountPaginator(queryset, 2)
+            self.assertEqual(paginator.count, 4)
+            page = paginator.page(2)
+            self.assertTrue(page.has_next())
+            self.assertTrue(paginator.page(3).has_next())
+            last = paginator.page(4)
+        self.assertEqual([indicator.code for indicator in last], ['IND-6'])
+        self.assertFalse(last.has_next())
+        self.assertEqual(paginator.count, 7)
+
+    def test_stale_cached_count(self):
+        queryset = Indicator.objects.order_by('id')
+        self.assertEqual(EstimatedCountPaginator(queryset, 5).count, 7)
+        self.add_indicators(5)
+
+        paginator = EstimatedCountPaginator(queryset, 5)
+        self.assertEqual(paginator.count, 7)
+        self.assertTrue(paginator.page(2).has_next())
+        self.assertEqual(len(paginator.page(3)), 2)
+        self.assertEqual(paginator.num_pages, 3)
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+
+
+class AccessContextTests(TestCase):
+    """Profile and accessible units are resolved once and filter by unit id."""
+
+    def setUp(self):
+        self.unit = Unit.objects.create(name='Strategic Affairs', type='STRATEGIC')
+        self.office = Unit.objects.create(name='Office', type='STATE_MINISTER', parent=self.unit)
+        self.user = User.objects.create_user('officer', 'officer@example.com', 'password')
+        UserProfile.objects.create(user=self.user, role='STATE_MINISTER', unit=self.office)
+        for unit in (self.unit, self.office):
+            WorkflowAudit.objects.create(actor=self.user, unit=unit, action='UPDATE', message=unit.name)
+
+    def test_context_is_resolved_once(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            access = get_access_context(user)
+            self.assertIs(get_access_context(user), access)
+        self.assertEqual(access.unit_ids, {self.office.id})
+        self.assertTrue(access.can_access_unit(self.office.id))
+        self.assertFalse(access.can_access_unit(self.unit))
+
+    def test_views_filter_by_accessible_unit_ids(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.user.pk))
+        response = client.get('/api/dashboard/recent_activities/')
+        self.assertEqual([audit['message'] for audit in response.json()], ['Office'])
+
+
+# Query counts assume a cache that is not stored in the database
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class DashboardStatsTests(AdminTestCase):
+    """Dashboard counts come from one aggregate query per table."""
+
+    def setUp(self):
+        super().setUp()
+        year = timezone.now().year
+        for status in ['DRAFT', 'SUBMITTED', 'APPROVED']:
+            unit = Unit.objects.create(name=f'Office {status}', type='STATE_MINISTER', parent=self.unit)
+            AnnualPlan.objects.create(year=year, unit=unit, created_by=self.admin, status=status)
+        AnnualPlan.objects.create(year=year - 1, unit=self.unit, created_by=self.admin, status='SUBMITTED')
+        self.authenticate()
+
+    def test_stats(self):
+        # Profile, units and indicators, plans, reports, activity rollups
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual(stats['total_units'], 4)
+        self.assertEqual(stats['annual_plans_current'], 3)
+        self.assertEqual(stats['annual_plans_submitted'], 1)
+        self.assertEqual(stats['annual_plans_approved'], 1)
+        self.assertEqual(stats['pending_approvals'], 2)
+
+    def test_stats_are_cached_until_a_write(self):
+        self.client.get('/api/dashboard/stats/')
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        # Only the profile and the activity rollup are read on a cache hit
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.json()['annual_plans_current'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AnnualPlan.objects.create(year=timezone.now().year, unit=self.unit, created_by=self.admin)
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.json()['annual_plans_current'], 4)
+
+    def test_audit_rows_keep_stats_cached(self):
+        self.client.get('/api/dashboard/stats/')
+        # Logins and logouts write audit rows
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkflowAudit.objects.create(actor=self.admin, unit=self.unit, action='UPDATE', message='User logged in')
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.json()['recent_activities_count'], 1)
+
+    def test_performance_summary(self):
+        response = self.client.get('/api/dashboard/performance_summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_plans'], 3)
+        self.assertAlmostEqual(response.json()['plan_approval_rate'], 100 / 3)
+
+    def test_warmed_stats_are_served_from_the_cache(self):
+        warm_stats()
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        # Only the profile and, for the dashboard, the activity rollup are read
+        with self.assertNumQueries(2):
+            self.client.get('/api/dashboard/stats/')
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        with self.assertNumQueries(1):
+            self.client.get('/api/dashboard/performance_summary/')
+
+    def test_warm_command_needs_a_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, 'not shared'):
+            call_command('warm_stats_cache')
+
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {'default': {'BACKEND': 'plans.cache_backends.FileBasedCache', 'LOCATION': location}}
+            with override_settings(CACHES=file_cache):
+                out = io.StringIO()
+                call_command('warm_stats_cache', stdout=out)
+        self.assertIn('Warmed statistics of 4 unit(s)', out.getvalue())
+
+    def test_cache_stats(self):
+        self.client.get('/api/dashboard/stats/')
+        stats = self.client.get('/api/dashboard/cache_stats/').json()
+        self.assertGreater(stats['hits'] + stats['misses'], 0)
+        self.assertIn('evictions', stats)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class ActivityStreamTests(TestCase):
+    """Audit events reach the stream subscribers of their unit and are replayed on reconnect."""
+
+    def setUp(self):
+        cache.clear()
+        self.unit = Unit.objects.create(name='Strategic Affairs', type='STRATEGIC')
+        self.office = Unit.objects.create(name='Office', type='STATE_MINISTER', parent=self.unit)
+        self.user = User.objects.create_user('officer', 'officer@example.com', 'password')
+        UserProfile.objects.create(user=self.user, role='STATE_MINISTER', unit=self.office)
+
+    def log(self, unit):
+        return WorkflowAudit.objects.create(actor=self.user, unit=unit, action='UPDATE')
+
+    def test_broker_fans_out_by_unit(self):
+        events = [audit_event(self.log(unit)) for unit in (self.unit, self.office)]
+
+        async def receive():
+            broker = ActivityBroker()
+            everything = broker.subscribe()
+            office = broker.subscribe({self.office.id})
+            for event in events:
+                broker.publish(event)
+            await asyncio.sleep(0)
+
+            received = ([await everything.get(1) for _ in events], [await office.get(1)])
+            with self.assertRaises(asyncio.TimeoutError):
+                await office.get(0.01)
+            broker.unsubscribe(everything)
+            broker.unsubscribe(office)
+            self.assertEqual(broker.subscriber_count, 0)
+            return received
+
+        everything, office = asyncio.run(receive())
+        self.assertEqual([event['id'] for event in everything], [event['id'] for event in events])
+        self.assertEqual([event['unit']['id'] for event in office], [self.office.id])
+
+    def test_missed_events_are_replayed(self):
+        first = self.log(self.office)
+        self.log(self.unit)
+        missed = self.log(self.office)
+
+        self.assertEqual([event['id'] for event in _missed_events({self.office.id}, str(first.id))], [missed.id])
+        self.assertEqual(len(_missed_events(None, str(first.id))), 2)
+        self.assertEqual(_missed_events({self.office.id}, None), [])
+        self.assertEqual(_missed_events({self.office.id}, 'latest'), [])
+
+    def test_tickets_are_single_use(self):
+        ticket = issue_stream_ticket(self.user)
+        self.assertEqual(redeem_stream_ticket(ticket), self.user)
+        self.assertIsNone(redeem_stream_ticket(ticket))
+
+        # A second connection that read the ticket before the first one deleted it
+        ticket = issue_stream_ticket(self.user)
+        with mock.patch.object(cache, 'delete'):
+            self.assertEqual(redeem_stream_ticket(ticket), self.user)
+            self.assertIsNone(redeem_stream_ticket(ticket))
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/audit/stream/ticket/')
+        self.assertEqual(redeem_stream_ticket(response.json()['ticket']), self.user)
+
+    def test_stream_needs_asgi(self):
+        ticket = issue_stream_ticket(self.user)
+        self.assertEqual(self.client.get('/api/audit/stream/', {'ticket': ticket}).status_code, 503)
+
+
+class CacheBackendStatsTests(SimpleTestCase):
+    """Shared cache backends report their evictions and lookups."""
+
+    def test_file_cache_counts_evictions_from_one_listing(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'plans.cache_backends.FileBasedCache',
+            'LOCATION': location,
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2},
+        }}):
+            cache.stats()
+            listings = []
+            deleted = []
+            list_files, delete = FileBasedCache._list_cache_files, FileBasedCache._delete
+
+            def listing(backend):
+                listings.append(1)
+                return list_files(backend)
+
+            def deleting(backend, fname):
+                removed = delete(backend, fname)
+                deleted.append(removed)
+                return removed
+
+            with mock.patch.object(FileBasedCache, '_list_cache_files', listing), \
+                    mock.patch.object(FileBasedCache, '_delete', deleting):
+                for index in range(30):
+                    cache.set(f'key-{index}', index)
+            self.assertEqual(len(listings), 30)
+            self.assertEqual(cache.stats()['evictions'], sum(deleted))
+            self.assertGreater(sum(deleted), 0)
+
+    def redis_cache(self, info=None):
+        backend = RedisCache('redis://localhost:6379/0', {})
+        backend.__dict__['_cache'] = RedisClientStub(info)
+        return backend
+
+    def test_redis_stats_from_server_info(self):
+        backend = self.redis_cache({'keyspace_hits': 3, 'keyspace_misses': 1, 'evicted_keys': 2})
+        backend.set('plan', 1)
+        self.assertEqual(backend.stats(), {
+            'hits': 3, 'misses': 1, 'evictions': 2, 'hit_rate': 0.75, 'entries': 1, 'backend': 'RedisCache',
+        })
+
+    def test_redis_stats_without_server_info(self):
+        backend = self.redis_cache()
+        backend.stats()
+        backend.set('plan', 1)
+        backend.get('plan')
+        backend.get('report')
+        stats = backend.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        # The plan and the shared hit and miss totals
+        self.assertEqual(stats['entries'], 3)
+        self.assertEqual(stats['backend'], 'RedisCache')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class CachedTokenAuthenticationTests(AdminTestCase):
+    """Token users and profiles are served from the cache until they change."""
+
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cache_hit_does_not_query_auth(self):
+        self.client.get('/api/dashboard/stats/')
+        # Token, user, profile and statistics come from the cache; only the
+        # activity count is read from the rollup
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_deactivation_invalidates(self):
+        self.client.get('/api/dashboard/stats/')
+        self.admin.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+        self.assertEqual(self.client.get('/api/dashboard/stats/').status_code, 401)
+
+    def test_cache_holds_no_password_hash(self):
+        self.client.get('/api/dashboard/stats/')
+        cached = cache.get(_token_cache_key(self.token.key))
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn(self.admin.password, repr(cached))
+
+        # The rebuilt user defers the hash rather than carrying an empty one
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        user, _ = CachedTokenAuthentication().authenticate(request)
+        self.assertEqual(user.profile.unit.name, 'Strategic Affairs')
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('password'))
+
+    def test_unit_change_invalidates(self):
+        self.client.get('/api/dashboard/stats/')
+        unit = Unit.objects.get()
+        unit.name = 'Planning'
+        with self.captureOnCommitCallbacks(execute=True):
+            unit.save()
+        self.assertIsNone(cache.get(_token_cache_key(self.token.key)))
+
+        self.client.get('/api/dashboard/stats/')
+        with self.captureOnCommitCallbacks(execute=True):
+            unit.delete()
+        self.assertIsNone(cache.get(_token_cache_key(self.token.key)))
+
+    def test_tokens_expire_unless_used(self):
+        tokens = Token.objects.filter(key=self.token.key)
+        tokens.update(created=timezone.now() - timedelta(days=6))
+        self.assertEqual(self.client.get('/api/dashboard/stats/').status_code, 200)
+        # Use renewed the validity window
+        self.assertGreater(tokens.get().created, timezone.now() - timedelta(minutes=1))
+
+        tokens.update(created=timezone.now() - timedelta(days=8))
+        cache.clear()
+        self.assertEqual(self.client.get('/api/dashboard/stats/').status_code, 401)
+        self.assertFalse(tokens.exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class TokenLifecycleTests(AdminTestCase):
+    """Logins rotate tokens, logouts revoke them and purge_tokens removes stale ones."""
+
+    def login(self):
+        client = APIClient()
+        response = client.post('/api/auth/login/', {'username': 'admin', 'password': 'password'})
+        self.assertEqual(response.status_code, 200)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        return client, response.data['token']
+
+    def test_login_rotates_token(self):
+        first, first_key = self.login()
+        self.assertEqual(first.get('/api/auth/me/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second, second_key = self.login()
+        self.assertNotEqual(first_key, second_key)
+        # One token per user: the earlier session is signed out, cached or not
+        self.assertEqual(first.get('/api/auth/me/').status_code, 401)
+        self.assertEqual(second.get('/api/auth/me/').status_code, 200)
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [second_key])
+
+    def test_logout_deletes_token(self):
+        client, key = self.login()
+        client.get('/api/auth/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post('/api/auth/logout/').status_code, 200)
+        self.assertFalse(Token.objects.filter(key=key).exists())
+        self.assertIsNone(cache.get(_token_cache_key(key)))
+        self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    def test_purge_tokens(self):
+        active = Token.objects.create(user=self.admin)
+        expired = Token.objects.create(user=User.objects.create_user('expired'))
+        Token.objects.filter(pk=expired.pk).update(created=timezone.now() - timedelta(days=8))
+        Token.objects.create(user=User.objects.create_user('inactive', is_active=False))
+
+        out = io.StringIO()
+        call_command('purge_tokens', batch_size=1, stdout=out)
+        self.assertIn('Deleted 2 expired or deactivated token(s)', out.getvalue())
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [active.key])
+
+
+class SessionSettingsTests(SimpleTestCase):
+    """SESSION_BACKEND picks the session engine, defaulting by cache backend."""
+
+    def load_settings(self, **environ):
+        with mock.patch.dict(os.environ, environ), contextlib.redirect_stdout(io.StringIO()):
+            for name in ('CACHE_BACKEND', 'SESSION_BACKEND'):
+                if name not in environ:
+                    os.environ.pop(name, None)
+            return runpy.run_path(importlib.util.find_spec(settings.SETTINGS_MODULE).origin)
+
+    def test_default_follows_cache_backend(self):
+        self.assertEqual(
+            self.load_settings(CACHE_BACKEND='locmem')['SESSION_ENGINE'],
+            'django.contrib.sessions.backends.db',
+        )
+        with tempfile.TemporaryDirectory() as location:
+            loaded = self.load_settings(CACHE_BACKEND='file', CACHE_LOCATION=location)
+        self.assertEqual(loaded['SESSION_ENGINE'], 'django.contrib.sessions.backends.cached_db')
+
+    def test_explicit_backend(self):
+        loaded = self.load_settings(CACHE_BACKEND='locmem', SESSION_BACKEND='signed_cookies')
+        self.assertEqual(loaded['SESSION_ENGINE'], 'django.contrib.sessions.backends.signed_cookies')
+
+        with self.assertRaisesMessage(ValueError, "not 'redis'"):
+            self.load_settings(SESSION_BACKEND='redis')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class SessionCommandTests(TestCase):
+    """clear_expired_sessions deletes in batches; bench_sessions leaves nothing behind."""
+
+    def test_clear_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='current', session_data='', expire_date=now + timedelta(days=1))
+
+        out = io.StringIO()
+        with mock.patch.object(QuerySet, 'delete', autospec=True, side_effect=QuerySet.delete) as delete:
+            call_command('clear_expired_sessions', batch_size=2, stdout=out)
+        self.assertEqual(delete.call_count, 3)
+        self.assertIn('Deleted 5 expired session(s)', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+
+    def test_batch_size_must_be_positive(self):
+        for command in ('clear_expired_sessions', 'purge_tokens'):
+            with self.subTest(command=command), self.assertRaisesMessage(CommandError, '--batch-size'):
+                call_command(command, batch_size=0)
+
+    def test_bench_sessions_cleans_up(self):
+        cache.clear()
+        out = io.StringIO()
+        call_command('bench_sessions', requests=1, stdout=out)
+        for name in settings.SESSION_ENGINES:
+            self.assertIn(name, out.getvalue())
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(User.objects.filter(username='benchmark-sessions').exists())
+        self.assertFalse([key for key in cache._cache if 'sessions' in key])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'plans.cache_backends.LocMemCache'}})
+class SingleFlightTests(SimpleTestCase):
+    """Concurrent misses for the same statistics compute them once."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_share_one_computation(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'total': 1}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cached_stats('test', 'all', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total': 1}] * 8)
+
+    @override_settings(STATS_LOCK_TIMEOUT=0.1)
+    def test_waiting_out_a_lock_leaves_it_alone(self):
+        # Another worker is still computing, past the lock timeout
+        cache.set('plans:test:lock', 'other-worker', None)
+        self.assertEqual(single_flight('plans:test', lambda: {'total': 1}, 60), {'total': 1})
+        self.assertEqual(cache.get('plans:test:lock'), 'other-worker')
+
+        self.assertEqual(single_flight('plans:other', lambda: {'total': 2}, 60), {'total': 2})
+        self.assertIsNone(cache.get('plans:other:lock'))
@@ -19,6 +19,7 @@ from .views.quarterly_reports import QuarterlyReportViewSet, QuarterlyIndicatorE
 from .views.audit import AuditViewSet
 from .views.import_export import ImportExportViewSet
 from .views.auth import LoginView, RegistrationView, LogoutView, MeView
+from .views.events import StreamTicketView, activity_stream
 
 app_name = 'plans'
 
@@ -63,8 +64,14 @@ auth_urlpatterns = [
     path('auth/me/', MeView.as_view(), name='me'),
 ]
 
+# Server-sent event streams; these must precede the router's detail routes
+stream_urlpatterns = [
+    path('audit/stream/', activity_stream, name='activity-stream'),
+    path('audit/stream/ticket/', StreamTicketView.as_view(), name='activity-stream-ticket'),
+]
+
 # Combine all URLs. If nested routers are unavailable, skip their URLs.
-urlpatterns = auth_urlpatterns + router.urls
+urlpatterns = auth_urlpatterns + stream_urlpatterns + router.urls
 if units_router is not None:
     urlpatterns += units_router.urls
 if annual_plans_router is not None:
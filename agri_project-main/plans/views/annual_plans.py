@@ -6,26 +6,53 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Prefetch
 
 from ..models import AnnualPlan, AnnualPlanTarget, Indicator
 from ..serializers import (
     AnnualPlanSerializer, AnnualPlanListSerializer, AnnualPlanTargetSerializer,
     AnnualPlanValidationSerializer, BulkApproveSerializer, BulkRejectSerializer
 )
-from .base import BaseViewSet, can_user_access_unit, get_user_profile
+from ..warmup import warm_stats_later
+from .base import ApprovedOutputCacheMixin, BaseViewSet, MessagePackMixin, can_user_access_unit, get_user_profile, snapshot_fields, diff_fields
 
 
-class AnnualPlanViewSet(BaseViewSet):
+# Columns rendered by AnnualPlanTargetSerializer, plus the plan key the prefetch joins on
+TARGET_FIELDS = (
+    'plan', 'indicator', 'target_value', 'baseline_value', 'remarks',
+    'indicator__code', 'indicator__name', 'indicator__unit_of_measure',
+)
+
+
+class AnnualPlanViewSet(ApprovedOutputCacheMixin, MessagePackMixin, BaseViewSet):
     """Annual plan management API endpoints."""
     queryset = AnnualPlan.objects.all()
     serializer_class = AnnualPlanSerializer
+    output_cache_label = 'plan'
+    # Actions that render the full serializer with nested targets
+    nested_actions = ('list', 'retrieve', 'submit', 'approve', 'reject')
     
     def get_queryset(self):
         """Filter annual plans based on user role and year."""
         profile = get_user_profile(self.request.user)
         year = self.request.query_params.get('year', timezone.now().year)
         
-        queryset = AnnualPlan.objects.filter(year=year)
+        queryset = self.select_rendered(
+            AnnualPlan.objects.filter(year=year),
+            unit='unit',
+            created_by='created_by',
+            approved_by='approved_by'
+        )
+        
+        if self.action in self.nested_actions and self.expands_field('targets'):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'targets',
+                    queryset=AnnualPlanTarget.objects.select_related('indicator').only(*TARGET_FIELDS)
+                )
+            )
+        elif self.renders_field('targets_count') or self.renders_field('can_submit'):
+            queryset = queryset.annotate(targets_count=Count('targets'))
         
         if profile and profile.role != 'SUPERADMIN':
             queryset = queryset.filter(unit=profile.unit)
@@ -88,26 +115,31 @@ class AnnualPlanViewSet(BaseViewSet):
             serializer.instance.unit,
             'CREATE',
             context_plan=serializer.instance,
-            message=f"Created annual plan for {serializer.instance.year}"
+            message=f"Created annual plan for {serializer.instance.year}",
+            entity=serializer.instance,
+            changes=diff_fields({}, snapshot_fields(serializer.instance))
         )
     
     def perform_update(self, serializer):
         """Log updates."""
+        before = snapshot_fields(serializer.instance)
+        serializer.save()
         self.log_action(
             serializer.instance.unit,
             'UPDATE',
             context_plan=serializer.instance,
-            message=f"Updated annual plan for {serializer.instance.year}"
+            message=f"Updated annual plan for {serializer.instance.year}",
+            entity=serializer.instance,
+            changes=diff_fields(before, snapshot_fields(serializer.instance))
         )
-        serializer.save()
     
     def perform_destroy(self, instance):
         """Log deletion."""
         self.log_action(
             instance.unit,
             'DELETE',
-            context_plan=instance,
-            message=f"Deleted annual plan for {instance.year}"
+            message=f"Deleted annual plan for {instance.year}",
+            entity=instance
         )
         instance.delete()
     
@@ -116,13 +148,14 @@ class AnnualPlanViewSet(BaseViewSet):
         """Submit annual plan for approval."""
         plan = self.get_object()
         
-        if not can_user_access_unit(request.user, plan.unit):
+        if not can_user_access_unit(request.user, plan.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if plan.status != 'DRAFT':
             return Response({'error': 'Only draft plans can be submitted'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not plan.targets.exists():
+        # Evaluates the prefetched targets, which the response reuses
+        if not plan.targets.all():
             return Response({'error': 'Cannot submit plan without targets'}, status=status.HTTP_400_BAD_REQUEST)
         
         plan.status = 'SUBMITTED'
@@ -145,7 +178,7 @@ class AnnualPlanViewSet(BaseViewSet):
         plan = self.get_object()
         profile = get_user_profile(request.user)
         
-        if not can_user_access_unit(request.user, plan.unit):
+        if not can_user_access_unit(request.user, plan.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if profile.role not in ['SUPERADMIN', 'STRATEGIC_AFFAIRS']:
@@ -165,6 +198,7 @@ class AnnualPlanViewSet(BaseViewSet):
             context_plan=plan,
             message=f"Approved annual plan for {plan.year}"
         )
+        warm_stats_later([plan.unit_id], [plan.year])
         
         serializer = self.get_serializer(plan)
         return Response(serializer.data)
@@ -175,7 +209,7 @@ class AnnualPlanViewSet(BaseViewSet):
         plan = self.get_object()
         profile = get_user_profile(request.user)
         
-        if not can_user_access_unit(request.user, plan.unit):
+        if not can_user_access_unit(request.user, plan.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if profile.role not in ['SUPERADMIN', 'STRATEGIC_AFFAIRS']:
@@ -202,7 +236,7 @@ class AnnualPlanViewSet(BaseViewSet):
         """Get targets for an annual plan."""
         plan = self.get_object()
         
-        if not can_user_access_unit(request.user, plan.unit):
+        if not can_user_access_unit(request.user, plan.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         targets = plan.targets.all()
@@ -214,7 +248,7 @@ class AnnualPlanViewSet(BaseViewSet):
         """Add a target to an annual plan."""
         plan = self.get_object()
         
-        if not can_user_access_unit(request.user, plan.unit):
+        if not can_user_access_unit(request.user, plan.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if plan.status != 'DRAFT':
@@ -232,7 +266,9 @@ class AnnualPlanViewSet(BaseViewSet):
                     plan.unit,
                     'CREATE',
                     context_plan=plan,
-                    message=f"Added target for indicator {indicator.code}"
+                    message=f"Added target for indicator {indicator.code}",
+                    entity=serializer.instance,
+                    changes=diff_fields({}, snapshot_fields(serializer.instance))
                 )
                 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -255,6 +291,7 @@ class AnnualPlanViewSet(BaseViewSet):
             reason = serializer.validated_data.get('reason', '')
             
             approved_count = 0
+            approved_units, approved_years = set(), set()
             with transaction.atomic():
                 for plan_id in plan_ids:
                     try:
@@ -265,6 +302,8 @@ class AnnualPlanViewSet(BaseViewSet):
                             plan.approved_at = timezone.now()
                             plan.save()
                             approved_count += 1
+                            approved_units.add(plan.unit_id)
+                            approved_years.add(plan.year)
                             
                             self.log_action(
                                 plan.unit,
@@ -274,6 +313,7 @@ class AnnualPlanViewSet(BaseViewSet):
                             )
                     except AnnualPlan.DoesNotExist:
                         continue
+                warm_stats_later(approved_units, approved_years)
             
             return Response({
                 'message': f'{approved_count} plans approved successfully',
@@ -322,7 +362,7 @@ class AnnualPlanViewSet(BaseViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AnnualPlanTargetViewSet(BaseViewSet):
+class AnnualPlanTargetViewSet(MessagePackMixin, BaseViewSet):
     """Annual plan target management API endpoints."""
     queryset = AnnualPlanTarget.objects.all()
     serializer_class = AnnualPlanTargetSerializer
@@ -332,19 +372,30 @@ class AnnualPlanTargetViewSet(BaseViewSet):
         profile = get_user_profile(self.request.user)
         plan_id = self.request.query_params.get('plan_id')
         
+        queryset = None
         if plan_id:
             try:
                 plan = AnnualPlan.objects.get(id=plan_id)
-                if can_user_access_unit(self.request.user, plan.unit):
-                    return AnnualPlanTarget.objects.filter(plan=plan)
+                if can_user_access_unit(self.request.user, plan.unit_id):
+                    queryset = AnnualPlanTarget.objects.filter(plan=plan)
             except AnnualPlan.DoesNotExist:
                 pass
         
-        # Fallback to user's accessible plans
-        if profile.role == 'SUPERADMIN':
-            return AnnualPlanTarget.objects.all()
-        else:
-            return AnnualPlanTarget.objects.filter(plan__unit=profile.unit)
+        if queryset is None:
+            # Fallback to user's accessible plans
+            if profile.role == 'SUPERADMIN':
+                queryset = AnnualPlanTarget.objects.all()
+            else:
+                queryset = AnnualPlanTarget.objects.filter(plan__unit=profile.unit)
+        
+        queryset = self.select_rendered(
+            queryset,
+            indicator='indicator'
+        )
+        if self.expands_field('indicator'):
+            # The nested indicator never renders its description
+            queryset = queryset.defer('indicator__description')
+        return self.defer_unrendered(queryset, 'remarks')
     
     def perform_create(self, serializer):
         """Create target with validation."""
@@ -356,7 +407,7 @@ class AnnualPlanTargetViewSet(BaseViewSet):
         
         try:
             plan = AnnualPlan.objects.get(id=plan_id)
-            if not can_user_access_unit(self.request.user, plan.unit):
+            if not can_user_access_unit(self.request.user, plan.unit_id):
                 raise PermissionDenied('Permission denied')
             
             if plan.status != 'DRAFT':
@@ -368,7 +419,9 @@ class AnnualPlanTargetViewSet(BaseViewSet):
                 plan.unit,
                 'CREATE',
                 context_plan=plan,
-                message=f"Added target for indicator {serializer.instance.indicator.code}"
+                message=f"Added target for indicator {serializer.instance.indicator.code}",
+                entity=serializer.instance,
+                changes=diff_fields({}, snapshot_fields(serializer.instance))
             )
             
         except AnnualPlan.DoesNotExist:
@@ -381,26 +434,29 @@ class AnnualPlanTargetViewSet(BaseViewSet):
         target = self.get_object()
         plan = target.plan
         
-        if not can_user_access_unit(self.request.user, plan.unit):
+        if not can_user_access_unit(self.request.user, plan.unit_id):
             raise PermissionDenied('Permission denied')
         
         if plan.status != 'DRAFT':
             raise ValidationError({'error': 'Cannot modify targets in submitted/approved plans'})
         
+        before = snapshot_fields(target)
         serializer.save()
         
         self.log_action(
             plan.unit,
             'UPDATE',
             context_plan=plan,
-            message=f"Updated target for indicator {target.indicator.code}"
+            message=f"Updated target for indicator {target.indicator.code}",
+            entity=serializer.instance,
+            changes=diff_fields(before, snapshot_fields(serializer.instance))
         )
     
     def perform_destroy(self, instance):
         """Delete target with validation."""
         plan = instance.plan
         
-        if not can_user_access_unit(self.request.user, plan.unit):
+        if not can_user_access_unit(self.request.user, plan.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if plan.status != 'DRAFT':
@@ -410,7 +466,8 @@ class AnnualPlanTargetViewSet(BaseViewSet):
             plan.unit,
             'DELETE',
             context_plan=plan,
-            message=f"Deleted target for indicator {instance.indicator.code}"
+            message=f"Deleted target for indicator {instance.indicator.code}",
+            entity=instance
         )
         
         instance.delete()
\ No newline at end of file
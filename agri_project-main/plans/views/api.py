@@ -8,8 +8,9 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 
-from ..models import Unit, Indicator, AnnualPlan, QuarterlyIndicatorEntry
-from .base import can_user_access_unit, get_user_profile
+from ..models import Unit, Indicator, AnnualPlan
+from ..stats import current_dashboard_stats, plan_progress_summary, unit_statistics_summary
+from .base import can_user_access_unit
 
 
 @login_required
@@ -32,23 +33,10 @@ def get_annual_plan_progress(request, plan_id):
     """Get progress statistics for an annual plan (AJAX endpoint)."""
     try:
         plan = get_object_or_404(AnnualPlan, id=plan_id)
-        if not can_user_access_unit(request.user, plan.unit):
+        if not can_user_access_unit(request.user, plan.unit_id):
             return JsonResponse({'error': 'Permission denied'}, status=403)
         
-        # Calculate progress statistics
-        total_targets = plan.targets.count()
-        completed_entries = QuarterlyIndicatorEntry.objects.filter(
-            report__unit=plan.unit,
-            report__year=plan.year
-        ).count()
-        
-        progress = {
-            'total_targets': total_targets,
-            'completed_entries': completed_entries,
-            'completion_percentage': (completed_entries / total_targets * 100) if total_targets > 0 else 0
-        }
-        
-        return JsonResponse(progress)
+        return JsonResponse(plan_progress_summary(plan))
     
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -62,19 +50,7 @@ def get_unit_statistics(request, unit_id):
         if not can_user_access_unit(request.user, unit):
             return JsonResponse({'error': 'Permission denied'}, status=403)
         
-        current_year = timezone.now().year
-        
-        stats = {
-            'indicators_count': unit.indicators.filter(active=True).count(),
-            'annual_plans_count': unit.annual_plans.filter(year=current_year).count(),
-            'quarterly_reports_count': unit.quarterly_reports.filter(year=current_year).count(),
-            'pending_approvals': unit.annual_plans.filter(
-                year=current_year,
-                status='SUBMITTED'
-            ).count(),
-        }
-        
-        return JsonResponse(stats)
+        return JsonResponse(unit_statistics_summary(unit, timezone.now().year))
     
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -86,7 +62,7 @@ def get_quarterly_progress(request, report_id):
     try:
         from ..models import QuarterlyReport
         report = get_object_or_404(QuarterlyReport, id=report_id)
-        if not can_user_access_unit(request.user, report.unit):
+        if not can_user_access_unit(request.user, report.unit_id):
             return JsonResponse({'error': 'Permission denied'}, status=403)
         
         # Get related annual plan for comparison
@@ -153,33 +129,10 @@ def validate_indicator_code(request):
 def get_dashboard_data(request):
     """Get dashboard data (AJAX endpoint)."""
     try:
-        profile = get_user_profile(request.user)
-        if not profile:
+        if not request.access.profile:
             return JsonResponse({'error': 'User profile not found'}, status=403)
         
-        current_year = timezone.now().year
-        current_quarter = ((timezone.now().month - 1) // 3) + 1
-        
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
-        # Calculate statistics
-        stats = {
-            'total_units': accessible_units.count(),
-            'total_indicators': Indicator.objects.filter(owner_unit__in=accessible_units).count(),
-            'annual_plans_current': AnnualPlan.objects.filter(
-                year=current_year,
-                unit__in=accessible_units
-            ).count(),
-            'quarterly_reports_current': QuarterlyIndicatorEntry.objects.filter(
-                report__year=current_year,
-                report__quarter=current_quarter,
-                report__unit__in=accessible_units
-            ).count(),
-        }
+        stats = current_dashboard_stats(request.access.stats_scope)
         
         return JsonResponse(stats)
     
@@ -191,20 +144,13 @@ def get_dashboard_data(request):
 def get_recent_activities(request):
     """Get recent activities (AJAX endpoint)."""
     try:
-        profile = get_user_profile(request.user)
-        if not profile:
+        if not request.access.profile:
             return JsonResponse({'error': 'User profile not found'}, status=403)
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
         from ..models import WorkflowAudit
-        activities = WorkflowAudit.objects.filter(
-            unit__in=accessible_units
-        ).order_by('-created_at')[:10].values(
+        activities = request.access.filter_units(
+            WorkflowAudit.objects.order_by('-created_at')
+        )[:10].values(
             'id', 'action', 'message', 'created_at', 'actor__username', 'unit__name'
         )
         
@@ -7,9 +7,12 @@ from rest_framework.response import Response
 from django.utils import timezone
 from django.core.paginator import Paginator
 
-from ..models import WorkflowAudit, Unit, AnnualPlan, QuarterlyReport
-from ..serializers import WorkflowAuditSerializer, PerformanceSummarySerializer
-from .base import BaseViewSet, get_user_profile
+from ..models import WorkflowAudit, Unit
+from ..serializers import WorkflowAuditSerializer, WorkflowAuditFeedSerializer, PerformanceSummarySerializer
+from ..activity import MAX_ACTIVITY_DAYS, activity_histogram
+from ..stats import performance_summary, unit_performance_summary
+from ..search import search_audit_ids
+from .base import BaseViewSet
 
 
 class AuditViewSet(BaseViewSet):
@@ -19,70 +22,132 @@ class AuditViewSet(BaseViewSet):
     
     def get_queryset(self):
         """Filter audit logs based on user access."""
-        profile = get_user_profile(self.request.user)
+        queryset = self.get_access_context().filter_units(WorkflowAudit.objects.order_by('-created_at'))
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
+        if self.action == 'list':
+            queryset = queryset.feed()
         else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
-        return WorkflowAudit.objects.filter(unit__in=accessible_units).order_by('-created_at')
+            queryset = self.select_rendered(
+                queryset,
+                actor='actor',
+                unit='unit',
+                context_plan=('context_plan__unit', 'context_plan__created_by'),
+                context_report=('context_report__unit', 'context_report__created_by')
+            )
+        
+        return queryset
+    
+    def get_serializer_class(self):
+        """Render the list as a flat feed; detail keeps the nested context."""
+        if self.action == 'list':
+            return WorkflowAuditFeedSerializer
+        return WorkflowAuditSerializer
     
     @action(detail=False, methods=['get'])
     def recent_activities(self, request):
         """Get recent activities."""
-        profile = get_user_profile(request.user)
-        
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
+        access = self.get_access_context()
         
         # Recent activities
-        recent_activities = WorkflowAudit.objects.filter(
-            unit__in=accessible_units
-        ).order_by('-created_at')[:10]
+        recent_activities = access.filter_units(
+            WorkflowAudit.objects.order_by('-created_at')
+        ).feed()[:10]
         
-        serializer = WorkflowAuditSerializer(recent_activities, many=True)
+        serializer = WorkflowAuditFeedSerializer(recent_activities, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """Get the change history of one plan, report, target or entry."""
+        entity_type = request.query_params.get('entity_type')
+        entity_id = request.query_params.get('entity_id')
+        
+        if not entity_type or not entity_id:
+            return Response(
+                {'error': 'entity_type and entity_id parameters required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            entity_id = int(entity_id)
+        except ValueError:
+            return Response({'error': 'entity_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        history = self.get_queryset().filter(
+            entity_type=entity_type,
+            entity_id=entity_id
+        ).select_related('actor', 'unit')
+        
+        serializer = WorkflowAuditSerializer(history, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search over audit messages, actor and unit names."""
+        access = self.get_access_context()
+        query = request.query_params.get('q', '').strip()
+        
+        if not query:
+            return Response({'error': 'q parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if page < 1:
+            return Response({'error': 'page must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Fetch one extra id to know whether another page exists
+        ids = search_audit_ids(query, access.unit_ids, limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(ids) > page_size
+        ids = ids[:page_size]
+        
+        audits = WorkflowAudit.objects.select_related('actor', 'unit').in_bulk(ids)
+        serializer = WorkflowAuditSerializer([audits[audit_id] for audit_id in ids if audit_id in audits], many=True)
+        
+        return Response({
+            'query': query,
+            'page': page,
+            'page_size': page_size,
+            'has_next': has_next,
+            'results': serializer.data,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def activity(self, request):
+        """Get daily action counts from the activity rollup."""
+        access = self.get_access_context()
+        
+        try:
+            days = int(request.query_params.get('days', 365))
+            unit_id = int(request.query_params.get('unit_id') or 0)
+        except ValueError:
+            return Response({'error': 'days and unit_id must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not 1 <= days <= MAX_ACTIVITY_DAYS:
+            return Response(
+                {'error': f'days must be between 1 and {MAX_ACTIVITY_DAYS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        unit_ids = access.unit_ids
+        if unit_id:
+            unit_ids = [unit_id] if access.can_access_unit(unit_id) else []
+        
+        return Response({
+            'days': days,
+            'activity': activity_histogram(unit_ids, days=days),
+        })
+    
     @action(detail=False, methods=['get'])
     def performance_summary(self, request):
         """Get performance summary and analytics."""
-        profile = get_user_profile(request.user)
+        access = self.get_access_context()
         year = request.query_params.get('year', timezone.now().year)
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
-        # Get performance data
-        annual_plans = AnnualPlan.objects.filter(year=year, unit__in=accessible_units)
-        quarterly_reports = QuarterlyReport.objects.filter(year=year, unit__in=accessible_units)
-        
-        # Calculate statistics
-        stats = {
-            'year': year,
-            'total_plans': annual_plans.count(),
-            'approved_plans': annual_plans.filter(status='APPROVED').count(),
-            'total_reports': quarterly_reports.count(),
-            'approved_reports': quarterly_reports.filter(status='APPROVED').count(),
-        }
-        
-        # Calculate completion percentages
-        if stats['total_plans'] > 0:
-            stats['plan_approval_rate'] = (stats['approved_plans'] / stats['total_plans']) * 100
-        else:
-            stats['plan_approval_rate'] = 0
-        
-        if stats['total_reports'] > 0:
-            stats['report_approval_rate'] = (stats['approved_reports'] / stats['total_reports']) * 100
-        else:
-            stats['report_approval_rate'] = 0
+        stats = performance_summary(access.stats_scope, year)
         
         serializer = PerformanceSummarySerializer(stats)
         return Response(serializer.data)
@@ -90,7 +155,7 @@ class AuditViewSet(BaseViewSet):
     @action(detail=False, methods=['get'])
     def unit_performance(self, request):
         """Get performance summary for a specific unit."""
-        profile = get_user_profile(request.user)
+        access = self.get_access_context()
         unit_id = request.query_params.get('unit_id')
         
         if not unit_id:
@@ -100,48 +165,20 @@ class AuditViewSet(BaseViewSet):
             unit = Unit.objects.get(id=unit_id)
             
             # Check access permissions
-            if profile.role != 'SUPERADMIN' and profile.unit != unit:
+            if not access.can_access_unit(unit):
                 return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
             
             year = request.query_params.get('year', timezone.now().year)
             
             # Get performance data for this unit
-            annual_plans = AnnualPlan.objects.filter(year=year, unit=unit)
-            quarterly_reports = QuarterlyReport.objects.filter(year=year, unit=unit)
-            
-            # Calculate detailed statistics
-            stats = {
-                'unit_name': unit.name,
-                'year': year,
-                'total_plans': annual_plans.count(),
-                'draft_plans': annual_plans.filter(status='DRAFT').count(),
-                'submitted_plans': annual_plans.filter(status='SUBMITTED').count(),
-                'approved_plans': annual_plans.filter(status='APPROVED').count(),
-                'rejected_plans': annual_plans.filter(status='REJECTED').count(),
-                'total_reports': quarterly_reports.count(),
-                'draft_reports': quarterly_reports.filter(status='DRAFT').count(),
-                'submitted_reports': quarterly_reports.filter(status='SUBMITTED').count(),
-                'approved_reports': quarterly_reports.filter(status='APPROVED').count(),
-                'rejected_reports': quarterly_reports.filter(status='REJECTED').count(),
-            }
-            
-            # Calculate completion rates
-            if stats['total_plans'] > 0:
-                stats['plan_approval_rate'] = (stats['approved_plans'] / stats['total_plans']) * 100
-            else:
-                stats['plan_approval_rate'] = 0
-            
-            if stats['total_reports'] > 0:
-                stats['report_approval_rate'] = (stats['approved_reports'] / stats['total_reports']) * 100
-            else:
-                stats['report_approval_rate'] = 0
+            stats = unit_performance_summary(unit, year)
             
             # Get recent activities for this unit
             recent_activities = WorkflowAudit.objects.filter(
                 unit=unit
-            ).order_by('-created_at')[:10]
+            ).order_by('-created_at').feed()[:10]
             
-            recent_activities_data = WorkflowAuditSerializer(recent_activities, many=True).data
+            recent_activities_data = WorkflowAuditFeedSerializer(recent_activities, many=True).data
             
             return Response({
                 'unit': {
@@ -159,17 +196,11 @@ class AuditViewSet(BaseViewSet):
     @action(detail=False, methods=['get'])
     def export_audit_log(self, request):
         """Export audit log as CSV."""
-        profile = get_user_profile(request.user)
-        
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
+        access = self.get_access_context()
         
         # Get audit logs
-        audit_logs = WorkflowAudit.objects.filter(
-            unit__in=accessible_units
+        audit_logs = access.filter_units(
+            WorkflowAudit.objects.all()
         ).select_related('actor', 'unit', 'context_plan', 'context_report').order_by('-created_at')
         
         # Create CSV response
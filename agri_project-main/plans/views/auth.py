@@ -24,6 +24,7 @@ from plans.serializers import (
     UnitNestedSerializer,
 )
 
+from ..authentication import rotate_token
 from ..models import Unit, UserProfile, Indicator, AnnualPlan
 from .base import (
     BaseViewSet,
@@ -96,8 +97,8 @@ class LoginView(APIView):
             if profile and profile.unit:
                 log_workflow_action(user, profile.unit, 'UPDATE', message="User logged in")
 
-            # Get or create token for the user
-            token, _ = Token.objects.get_or_create(user=user)
+            # Issue a new token, replacing any earlier one
+            token = rotate_token(user)
 
             return Response({
                 'token': token.key,
@@ -187,6 +188,9 @@ class LogoutView(APIView):
             log_workflow_action(request.user, profile.unit, 'UPDATE', message="User logged out")
 
         logout(request)
+        if isinstance(request.auth, Token):
+            # Revoke the token; plans.signals drops its cached authentication
+            request.auth.delete()
         return Response({'message': 'Logout successful'})
 
 
@@ -5,39 +5,58 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
+from django.db.models import prefetch_related_objects
+from django.db.models.fields.files import FieldFile
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 
+from ..access import get_access_context
+from ..cache import approved_output_key
 from ..models import UserProfile, WorkflowAudit
+from ..renderers import MessagePackRenderer, msgpack
+from ..serializers import ValuesSerializer
 
 
 def get_user_profile(user):
-    """Get user profile or create one if it doesn't exist."""
-    if user.is_anonymous:
-        return None
-    try:
-        return user.profile
-    except UserProfile.DoesNotExist:
-        return None
+    """Get the user's profile, or None if it doesn't exist."""
+    return get_access_context(user).profile
 
 
 def can_user_access_unit(user, unit):
-    """Check if user can access a specific unit."""
-    profile = get_user_profile(user)
-    if not profile:
-        return False
-    
-    # Super admin can access all units
-    if profile.role == 'SUPERADMIN':
-        return True
-    
-    # Users can only access their own unit
-    return profile.unit == unit
+    """Check if user can access a specific unit (or unit id)."""
+    return get_access_context(user).can_access_unit(unit)
+
+
+def snapshot_fields(instance):
+    """Plain values of an instance's editable concrete fields, keyed by attribute name."""
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.primary_key or getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            continue
+        value = getattr(instance, field.attname)
+        if isinstance(value, FieldFile):
+            value = value.name or None
+        values[field.attname] = value
+    return values
 
 
-def log_workflow_action(user, unit, action, context_plan=None, context_report=None, message=""):
+def diff_fields(before, after):
+    """Fields that differ between two snapshots, as ``{field: [old, new]}``."""
+    return {
+        name: [before.get(name), value]
+        for name, value in after.items()
+        if before.get(name) != value
+    }
+
+
+def log_workflow_action(user, unit, action, context_plan=None, context_report=None, message="",
+                        entity=None, changes=None):
     """Log workflow actions for audit trail."""
     WorkflowAudit.objects.create(
         actor=user,
@@ -45,10 +64,69 @@ def log_workflow_action(user, unit, action, context_plan=None, context_report=No
         action=action,
         context_plan=context_plan,
         context_report=context_report,
-        message=message
+        message=message,
+        entity_type=entity._meta.model_name if entity is not None else '',
+        entity_id=entity.pk if entity is not None else None,
+        changes=changes or None
     )
 
 
+class MessagePackMixin:
+    """Offer MessagePack responses alongside JSON when msgpack is installed."""
+    
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if msgpack is not None:
+            renderers.append(MessagePackRenderer())
+        return renderers
+
+
+class ApprovedOutputCacheMixin:
+    """Serve detail responses of approved plans and reports as cached rendered bytes.
+
+    Approved objects cannot change through the API, so each representation
+    (media type and query string) is rendered once and cached under the
+    approval time and the object's output generation (see plans.cache).
+    """
+    # Label of the output generation, 'plan' or 'report'
+    output_cache_label = None
+    # Renderer formats whose output is cached; the browsable API is rendered per user
+    output_cache_formats = ('json', 'msgpack')
+    
+    def retrieve(self, request, *args, **kwargs):
+        if request.accepted_renderer.format not in self.output_cache_formats:
+            return super().retrieve(request, *args, **kwargs)
+        
+        # Load the object without its nested rows, which a cache hit does not need
+        queryset = self.filter_queryset(self.get_queryset())
+        prefetches = queryset._prefetch_related_lookups
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        instance = get_object_or_404(queryset.prefetch_related(None), **lookup)
+        self.check_object_permissions(request, instance)
+        
+        key = None
+        if instance.status == 'APPROVED' and instance.approved_at:
+            key = approved_output_key(
+                self.output_cache_label, instance.pk, instance.approved_at,
+                f'{request.accepted_media_type}?{request.META.get("QUERY_STRING", "")}'
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                content_type, content = cached
+                return HttpResponse(content, content_type=content_type)
+        
+        prefetch_related_objects([instance], *prefetches)
+        response = Response(self.get_serializer(instance).data)
+        if key is not None:
+            response = self.finalize_response(request, response, *args, **kwargs)
+            response.render()
+            cache.set(
+                key, (response['Content-Type'], response.content),
+                getattr(settings, 'APPROVED_OUTPUT_CACHE_TIMEOUT', 86400)
+            )
+        return response
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class BaseViewSet(viewsets.ModelViewSet):
     """Base ViewSet with common functionality for all views."""
@@ -64,22 +142,86 @@ class BaseViewSet(viewsets.ModelViewSet):
         #     )
         # return super().dispatch(request, *args, **kwargs)
     
-    def get_user_profile(self):
-        """Get the current user's profile."""
-        profile = get_user_profile(self.request.user)
-        if not profile:
+    @property
+    def access(self):
+        """Access context of the current user: profile, role and accessible unit ids."""
+        return get_access_context(self.request.user)
+    
+    def get_access_context(self):
+        """Get the current user's access context, requiring a profile."""
+        access = self.access
+        if not access.profile:
             # Return a more helpful error message
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied(
                 "User profile not found. Please contact administrator to set up your profile."
             )
-        return profile
+        return access
+    
+    def get_user_profile(self):
+        """Get the current user's profile."""
+        return self.get_access_context().profile
+    
+    def get_field_selection(self):
+        """``?fields=`` and ``?expand=`` as sets of field names, or None when not given.
+
+        Only reads are pruned; writes validate and render the full field set.
+        """
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return None, None
+        params = self.request.query_params
+        return tuple(
+            {name.strip() for name in params[key].split(',') if name.strip()} if key in params else None
+            for key in ('fields', 'expand')
+        )
+    
+    def renders_field(self, name):
+        """Whether the response includes a top-level serializer field."""
+        fields, _ = self.get_field_selection()
+        return fields is None or name in fields
+    
+    def expands_field(self, name):
+        """Whether a nested serializer field is rendered in full rather than as an id."""
+        _, expand = self.get_field_selection()
+        return self.renders_field(name) and (expand is None or name in expand)
+    
+    def select_rendered(self, queryset, **lookups):
+        """Apply select_related for the nested fields that are expanded.
+        
+        Keyword names are serializer fields; values are a lookup or a tuple of lookups.
+        """
+        related = []
+        for name, lookup in lookups.items():
+            if self.expands_field(name):
+                related.extend((lookup,) if isinstance(lookup, str) else lookup)
+        return queryset.select_related(*related) if related else queryset
+    
+    def defer_unrendered(self, queryset, *names):
+        """Defer the columns of fields left out of the response."""
+        deferred = [name for name in names if not self.renders_field(name)]
+        return queryset.defer(*deferred) if deferred else queryset
+    
+    def get_serializer_context(self):
+        """Pass the requested fields and expansions to the serializer."""
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self.get_field_selection()
+        return context
+    
+    def values_response(self, queryset):
+        """Respond with ``queryset`` rendered from values() rows by ValuesSerializer."""
+        serializer = ValuesSerializer(self.get_serializer_class(), context=self.get_serializer_context())
+        rows = serializer.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.render(page))
+        return Response(serializer.render(rows))
     
     def can_access_unit(self, unit):
         """Check if current user can access a unit."""
-        return can_user_access_unit(self.request.user, unit)
+        return self.access.can_access_unit(unit)
     
-    def log_action(self, unit, action, context_plan=None, context_report=None, message=""):
+    def log_action(self, unit, action, context_plan=None, context_report=None, message="",
+                   entity=None, changes=None):
         """Log a workflow action."""
         log_workflow_action(
             self.request.user,
@@ -87,5 +229,7 @@ class BaseViewSet(viewsets.ModelViewSet):
             action,
             context_plan,
             context_report,
-            message
+            message,
+            entity=entity,
+            changes=changes
         )
@@ -4,14 +4,17 @@ Dashboard and overview views for the plans app using Django REST Framework.
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.cache import cache
 from django.utils import timezone
 
-from ..models import Unit, Indicator, AnnualPlan, QuarterlyReport, WorkflowAudit
+from ..models import AnnualPlan, WorkflowAudit
 from ..serializers import (
     DashboardStatsSerializer, PerformanceSummarySerializer, 
-    WorkflowAuditSerializer, AnnualPlanListSerializer
+    WorkflowAuditFeedSerializer, AnnualPlanListSerializer
 )
-from .base import BaseViewSet, get_user_profile
+from ..activity import MAX_ACTIVITY_DAYS, activity_histogram
+from ..stats import current_dashboard_stats, performance_summary
+from .base import BaseViewSet
 
 
 class DashboardViewSet(BaseViewSet):
@@ -20,30 +23,9 @@ class DashboardViewSet(BaseViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get dashboard statistics."""
-        profile = self.get_user_profile()
-        current_year = timezone.now().year
-        current_quarter = ((timezone.now().month - 1) // 3) + 1
+        access = self.get_access_context()
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
-        # Statistics
-        stats = {
-            'total_units': accessible_units.count(),
-            'total_indicators': Indicator.objects.filter(owner_unit__in=accessible_units).count(),
-            'annual_plans_current': AnnualPlan.objects.filter(
-                year=current_year,
-                unit__in=accessible_units
-            ).count(),
-            'quarterly_reports_current': QuarterlyReport.objects.filter(
-                year=current_year,
-                quarter=current_quarter,
-                unit__in=accessible_units
-            ).count(),
-        }
+        stats = current_dashboard_stats(access.stats_scope)
         
         serializer = DashboardStatsSerializer(stats)
         return Response(serializer.data)
@@ -51,40 +33,60 @@ class DashboardViewSet(BaseViewSet):
     @action(detail=False, methods=['get'])
     def recent_activities(self, request):
         """Get recent activities."""
-        profile = self.get_user_profile()
-        
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
+        access = self.get_access_context()
         
         # Recent activities
-        recent_activities = WorkflowAudit.objects.filter(
-            unit__in=accessible_units
-        ).order_by('-created_at')[:10]
+        recent_activities = access.filter_units(
+            WorkflowAudit.objects.order_by('-created_at')
+        ).feed()[:10]
         
-        serializer = WorkflowAuditSerializer(recent_activities, many=True)
+        serializer = WorkflowAuditFeedSerializer(recent_activities, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def activity(self, request):
+        """Get daily action counts for the activity chart."""
+        access = self.get_access_context()
+        
+        try:
+            days = int(request.query_params.get('days', 365))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not 1 <= days <= MAX_ACTIVITY_DAYS:
+            return Response(
+                {'error': f'days must be between 1 and {MAX_ACTIVITY_DAYS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'days': days,
+            'activity': activity_histogram(access.unit_ids, days=days),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Get cache hit, miss and eviction counts for monitoring."""
+        access = self.get_access_context()
+        
+        if access.role != 'SUPERADMIN':
+            return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if not hasattr(cache, 'stats'):
+            return Response({'backend': type(cache).__name__})
+        return Response(cache.stats())
+    
     @action(detail=False, methods=['get'])
     def pending_approvals(self, request):
         """Get pending approvals for approvers."""
-        profile = self.get_user_profile()
+        access = self.get_access_context()
         
-        if profile.role not in ['SUPERADMIN', 'STRATEGIC_AFFAIRS']:
+        if access.role not in ['SUPERADMIN', 'STRATEGIC_AFFAIRS']:
             return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
         # Pending approvals
-        pending_approvals = AnnualPlan.objects.filter(
-            status='SUBMITTED',
-            unit__in=accessible_units
+        pending_approvals = access.filter_units(
+            AnnualPlan.objects.for_listing().filter(status='SUBMITTED')
         ).order_by('-submitted_at')[:5]
         
         serializer = AnnualPlanListSerializer(pending_approvals, many=True)
@@ -93,38 +95,10 @@ class DashboardViewSet(BaseViewSet):
     @action(detail=False, methods=['get'])
     def performance_summary(self, request):
         """Get performance summary and analytics."""
-        profile = self.get_user_profile()
+        access = self.get_access_context()
         year = request.query_params.get('year', timezone.now().year)
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = Unit.objects.filter(id=profile.unit.id)
-        
-        # Get performance data
-        annual_plans = AnnualPlan.objects.filter(year=year, unit__in=accessible_units)
-        quarterly_reports = QuarterlyReport.objects.filter(year=year, unit__in=accessible_units)
-        
-        # Calculate statistics
-        stats = {
-            'year': year,
-            'total_plans': annual_plans.count(),
-            'approved_plans': annual_plans.filter(status='APPROVED').count(),
-            'total_reports': quarterly_reports.count(),
-            'approved_reports': quarterly_reports.filter(status='APPROVED').count(),
-        }
-        
-        # Calculate completion percentages
-        if stats['total_plans'] > 0:
-            stats['plan_approval_rate'] = (stats['approved_plans'] / stats['total_plans']) * 100
-        else:
-            stats['plan_approval_rate'] = 0
-        
-        if stats['total_reports'] > 0:
-            stats['report_approval_rate'] = (stats['approved_reports'] / stats['total_reports']) * 100
-        else:
-            stats['report_approval_rate'] = 0
+        stats = performance_summary(access.stats_scope, year)
         
         serializer = PerformanceSummarySerializer(stats)
         return Response(serializer.data)
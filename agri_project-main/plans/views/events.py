@@ -0,0 +1,162 @@
+"""
+Server-sent event stream of workflow activity for the plans app.
+
+The stream replaces polling of the recent_activities endpoints: clients
+keep one connection open and receive audit rows for their accessible units
+as they are committed. Streaming needs the ASGI application; under WSGI the
+view answers 503 and clients keep polling instead.
+
+EventSource cannot send an Authorization header, and a token in the URL
+would end up in access logs. Browser clients therefore first POST to
+/api/audit/stream/ticket/ for a single-use ticket that expires after
+STREAM_TICKET_TIMEOUT seconds, and open the stream with ``?ticket=``.
+Other clients may send their token in the Authorization header.
+"""
+import asyncio
+import json
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import permissions
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..access import get_access_context
+from ..authentication import CachedTokenAuthentication
+from ..events import audit_event, broker
+from ..models import WorkflowAudit
+
+KEEPALIVE_SECONDS = 15
+RECONNECT_MILLISECONDS = 3000
+REPLAY_LIMIT = 100
+
+
+def _ticket_cache_key(ticket):
+    return f'plans:stream-ticket:{ticket}'
+
+
+def issue_stream_ticket(user):
+    """A single-use ticket that opens one activity stream as ``user``."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_ticket_cache_key(ticket), user.pk, getattr(settings, 'STREAM_TICKET_TIMEOUT', 60))
+    return ticket
+
+
+def redeem_stream_ticket(ticket):
+    """The active user a ticket was issued to, or None; the ticket is used up."""
+    key = _ticket_cache_key(ticket)
+    user_id = cache.get(key)
+    if user_id is None:
+        return None
+    # Of concurrent redeemers that all read the ticket, only the one that
+    # claims it first gets the user
+    if not cache.add(f'{key}:redeemed', True, getattr(settings, 'STREAM_TICKET_TIMEOUT', 60)):
+        return None
+    cache.delete(key)
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StreamTicketView(APIView):
+    """Issue a ticket for opening the activity stream from EventSource."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'ticket': issue_stream_ticket(request.user),
+            'expires_in': getattr(settings, 'STREAM_TICKET_TIMEOUT', 60),
+        })
+
+
+def _resolve_stream_access(request, user):
+    """Return ``(user, unit_ids)`` for the stream; ``unit_ids=None`` means all units."""
+    header = request.headers.get('Authorization', '')
+    ticket = request.GET.get('ticket')
+    if header.startswith('Token '):
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(header[len('Token '):].strip())
+        except AuthenticationFailed:
+            user = None
+    elif ticket:
+        user = redeem_stream_ticket(ticket)
+
+    if user is None or not user.is_authenticated:
+        return None, None
+
+    return user, get_access_context(user).unit_ids
+
+
+def _missed_events(unit_ids, last_event_id):
+    """Audit events committed after ``last_event_id``, oldest first."""
+    if not last_event_id:
+        return []
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        return []
+
+    audits = WorkflowAudit.objects.filter(id__gt=last_event_id)
+    if unit_ids is not None:
+        audits = audits.filter(unit_id__in=unit_ids)
+    audits = audits.select_related('actor', 'unit').order_by('id')[:REPLAY_LIMIT]
+    return [audit_event(audit) for audit in audits]
+
+
+def _format_event(event):
+    return f"id: {event['id']}\nevent: activity\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(unit_ids, last_event_id):
+    yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+
+    subscription = broker.subscribe(unit_ids)
+    try:
+        last_sent = 0
+        for event in await sync_to_async(_missed_events)(unit_ids, last_event_id):
+            last_sent = event['id']
+            yield _format_event(event)
+
+        while True:
+            try:
+                event = await subscription.get(KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event['id'] > last_sent:
+                last_sent = event['id']
+                yield _format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def activity_stream(request):
+    """Stream new audit activity for the requesting user's units."""
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker cannot hold the connection open; clients keep polling
+        return JsonResponse(
+            {'error': 'The activity stream needs the ASGI server; poll recent_activities instead.'},
+            status=503
+        )
+    
+    session_user = await request.auser()
+    user, unit_ids = await sync_to_async(_resolve_stream_access)(request, session_user)
+
+    if user is None:
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+    if unit_ids == set():
+        return JsonResponse({'error': 'User profile not found.'}, status=403)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+    response = StreamingHttpResponse(_event_stream(unit_ids, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -77,7 +77,7 @@ class ImportExportViewSet(BaseViewSet):
             return Response({'error': 'Unit not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Check permissions
-        if profile.role != 'SUPERADMIN' and profile.unit != unit:
+        if not self.access.can_access_unit(unit):
             return Response({'error': 'You do not have permission to import data for this unit'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
@@ -249,19 +249,12 @@ class ImportExportViewSet(BaseViewSet):
     @action(detail=False, methods=['get'], url_path='export_annual_plans')
     def export_annual_plans(self, request):
         """Export all annual plans for a year."""
-        profile = get_user_profile(request.user)
+        access = self.get_access_context()
         year = request.query_params.get('year', timezone.now().year)
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = [profile.unit]
-        
         # Get annual plans
-        annual_plans = AnnualPlan.objects.filter(
-            year=year,
-            unit__in=accessible_units
+        annual_plans = access.filter_units(
+            AnnualPlan.objects.filter(year=year)
         ).select_related('unit', 'created_by')
         
         # Create CSV response
@@ -289,20 +282,13 @@ class ImportExportViewSet(BaseViewSet):
     @action(detail=False, methods=['get'], url_path='export_quarterly_reports')
     def export_quarterly_reports(self, request):
         """Export quarterly reports for a year/quarter."""
-        profile = get_user_profile(request.user)
+        access = self.get_access_context()
         year = request.query_params.get('year', timezone.now().year)
         quarter = request.query_params.get('quarter')
         
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = [profile.unit]
-        
         # Get quarterly reports
-        queryset = QuarterlyReport.objects.filter(
-            year=year,
-            unit__in=accessible_units
+        queryset = access.filter_units(
+            QuarterlyReport.objects.filter(year=year)
         ).select_related('unit', 'created_by')
         
         if quarter:
@@ -337,17 +323,11 @@ class ImportExportViewSet(BaseViewSet):
     @action(detail=False, methods=['get'], url_path='export_indicators')
     def export_indicators(self, request):
         """Export all indicators."""
-        profile = get_user_profile(request.user)
-        
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = [profile.unit]
+        access = self.get_access_context()
         
         # Get indicators
-        indicators = Indicator.objects.filter(
-            owner_unit__in=accessible_units
+        indicators = access.filter_units(
+            Indicator.objects.all(), 'owner_unit'
         ).select_related('owner_unit')
         
         # Create CSV response
@@ -374,17 +354,11 @@ class ImportExportViewSet(BaseViewSet):
     @action(detail=False, methods=['get'], url_path='export_audit_log')
     def export_audit_log(self, request):
         """Export audit log."""
-        profile = get_user_profile(request.user)
-        
-        # Get accessible units
-        if profile.role == 'SUPERADMIN':
-            accessible_units = Unit.objects.all()
-        else:
-            accessible_units = [profile.unit]
+        access = self.get_access_context()
         
         # Get audit logs
-        audit_logs = WorkflowAudit.objects.filter(
-            unit__in=accessible_units
+        audit_logs = access.filter_units(
+            WorkflowAudit.objects.all()
         ).select_related('actor', 'unit', 'context_plan', 'context_report').order_by('-created_at')
         
         # Create CSV response
@@ -8,10 +8,10 @@ from django.core.exceptions import PermissionDenied
 
 from ..models import Indicator
 from ..serializers import IndicatorSerializer, IndicatorValidationSerializer
-from .base import BaseViewSet, can_user_access_unit, get_user_profile
+from .base import BaseViewSet, MessagePackMixin, can_user_access_unit, get_user_profile
 
 
-class IndicatorViewSet(BaseViewSet):
+class IndicatorViewSet(MessagePackMixin, BaseViewSet):
     """Indicator management API endpoints."""
     queryset = Indicator.objects.all()
     serializer_class = IndicatorSerializer
@@ -22,8 +22,15 @@ class IndicatorViewSet(BaseViewSet):
         if not profile:
             return Indicator.objects.none()
         if profile.role == 'SUPERADMIN':
-            return Indicator.objects.all()
-        return Indicator.objects.filter(owner_unit=profile.unit)
+            queryset = Indicator.objects.all()
+        else:
+            queryset = Indicator.objects.filter(owner_unit=profile.unit)
+        queryset = self.select_rendered(queryset, owner_unit='owner_unit')
+        return self.defer_unrendered(queryset, 'description')
+    
+    def list(self, request, *args, **kwargs):
+        """List indicators from values() rows."""
+        return self.values_response(self.filter_queryset(self.get_queryset()))
     
     def perform_create(self, serializer):
         """Set owner_unit automatically when creating."""
@@ -126,8 +133,7 @@ class IndicatorViewSet(BaseViewSet):
                 return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
             
             indicators = Indicator.objects.filter(owner_unit=unit, active=True)
-            serializer = self.get_serializer(indicators, many=True)
-            return Response(serializer.data)
+            return self.values_response(indicators)
         except Unit.DoesNotExist:
             return Response({'error': 'Unit not found'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -136,7 +142,7 @@ class IndicatorViewSet(BaseViewSet):
         """Toggle indicator active status."""
         indicator = self.get_object()
         
-        if not can_user_access_unit(request.user, indicator.owner_unit):
+        if not can_user_access_unit(request.user, indicator.owner_unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         indicator.active = not indicator.active
@@ -6,19 +6,33 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Prefetch
 
 from ..models import QuarterlyReport, QuarterlyIndicatorEntry, Indicator
 from ..serializers import (
     QuarterlyReportSerializer, QuarterlyReportListSerializer, QuarterlyIndicatorEntrySerializer,
     QuarterlyReportValidationSerializer, BulkApproveSerializer, BulkRejectSerializer
 )
-from .base import BaseViewSet, can_user_access_unit, get_user_profile
+from ..warmup import warm_stats_later
+from .base import ApprovedOutputCacheMixin, BaseViewSet, MessagePackMixin, can_user_access_unit, get_user_profile, snapshot_fields, diff_fields
 
 
-class QuarterlyReportViewSet(BaseViewSet):
+# Columns rendered by QuarterlyIndicatorEntrySerializer, plus the report key the prefetch joins on
+ENTRY_FIELDS = (
+    'report', 'indicator', 'achieved_value', 'remarks', 'evidence_file', 'updated_by', 'updated_at',
+    'indicator__code', 'indicator__name', 'indicator__unit_of_measure',
+    'updated_by__username', 'updated_by__email', 'updated_by__first_name',
+    'updated_by__last_name', 'updated_by__is_active',
+)
+
+
+class QuarterlyReportViewSet(ApprovedOutputCacheMixin, MessagePackMixin, BaseViewSet):
     """Quarterly report management API endpoints."""
     queryset = QuarterlyReport.objects.all()
     serializer_class = QuarterlyReportSerializer
+    output_cache_label = 'report'
+    # Actions that render the full serializer with nested entries
+    nested_actions = ('list', 'retrieve', 'submit', 'approve', 'reject')
     
     def get_queryset(self):
         """Filter quarterly reports based on user role, year, and quarter."""
@@ -26,7 +40,24 @@ class QuarterlyReportViewSet(BaseViewSet):
         year = self.request.query_params.get('year', timezone.now().year)
         quarter = self.request.query_params.get('quarter')
         
-        queryset = QuarterlyReport.objects.filter(year=year)
+        queryset = self.select_rendered(
+            QuarterlyReport.objects.filter(year=year),
+            unit='unit',
+            created_by='created_by',
+            approved_by='approved_by'
+        )
+        
+        if self.action in self.nested_actions and self.expands_field('entries'):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'entries',
+                    queryset=QuarterlyIndicatorEntry.objects.select_related(
+                        'indicator', 'updated_by'
+                    ).only(*ENTRY_FIELDS)
+                )
+            )
+        elif self.renders_field('entries_count') or self.renders_field('can_submit'):
+            queryset = queryset.annotate(entries_count=Count('entries'))
         
         if quarter:
             queryset = queryset.filter(quarter=quarter)
@@ -46,26 +77,31 @@ class QuarterlyReportViewSet(BaseViewSet):
             profile.unit,
             'CREATE',
             context_report=serializer.instance,
-            message=f"Created quarterly report for Q{serializer.instance.quarter} {serializer.instance.year}"
+            message=f"Created quarterly report for Q{serializer.instance.quarter} {serializer.instance.year}",
+            entity=serializer.instance,
+            changes=diff_fields({}, snapshot_fields(serializer.instance))
         )
     
     def perform_update(self, serializer):
         """Log updates."""
+        before = snapshot_fields(serializer.instance)
+        serializer.save()
         self.log_action(
             serializer.instance.unit,
             'UPDATE',
             context_report=serializer.instance,
-            message=f"Updated quarterly report for Q{serializer.instance.quarter} {serializer.instance.year}"
+            message=f"Updated quarterly report for Q{serializer.instance.quarter} {serializer.instance.year}",
+            entity=serializer.instance,
+            changes=diff_fields(before, snapshot_fields(serializer.instance))
         )
-        serializer.save()
     
     def perform_destroy(self, instance):
         """Log deletion."""
         self.log_action(
             instance.unit,
             'DELETE',
-            context_report=instance,
-            message=f"Deleted quarterly report for Q{instance.quarter} {instance.year}"
+            message=f"Deleted quarterly report for Q{instance.quarter} {instance.year}",
+            entity=instance
         )
         instance.delete()
     
@@ -74,13 +110,14 @@ class QuarterlyReportViewSet(BaseViewSet):
         """Submit quarterly report for approval."""
         report = self.get_object()
 
-        if not can_user_access_unit(request.user, report.unit):
+        if not can_user_access_unit(request.user, report.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
         if report.status != 'DRAFT':
             return Response({'error': 'Only draft reports can be submitted'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not report.entries.exists():
+        # Evaluates the prefetched entries, which the response reuses
+        if not report.entries.all():
             return Response({'error': 'Cannot submit report without entries'}, status=status.HTTP_400_BAD_REQUEST)
 
         report.status = 'SUBMITTED'
@@ -103,7 +140,7 @@ class QuarterlyReportViewSet(BaseViewSet):
         report = self.get_object()
         profile = get_user_profile(request.user)
 
-        if not can_user_access_unit(request.user, report.unit):
+        if not can_user_access_unit(request.user, report.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
         if profile.role not in ['SUPERADMIN', 'STRATEGIC_AFFAIRS']:
@@ -123,6 +160,7 @@ class QuarterlyReportViewSet(BaseViewSet):
             context_report=report,
             message=f"Approved quarterly report for Q{report.quarter} {report.year}"
         )
+        warm_stats_later([report.unit_id], [report.year])
 
         serializer = self.get_serializer(report)
         return Response(serializer.data)
@@ -133,7 +171,7 @@ class QuarterlyReportViewSet(BaseViewSet):
         report = self.get_object()
         profile = get_user_profile(request.user)
 
-        if not can_user_access_unit(request.user, report.unit):
+        if not can_user_access_unit(request.user, report.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
         if profile.role not in ['SUPERADMIN', 'STRATEGIC_AFFAIRS']:
@@ -160,7 +198,7 @@ class QuarterlyReportViewSet(BaseViewSet):
         """Get entries for a quarterly report."""
         report = self.get_object()
         
-        if not can_user_access_unit(request.user, report.unit):
+        if not can_user_access_unit(request.user, report.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         entries = report.entries.all()
@@ -172,7 +210,7 @@ class QuarterlyReportViewSet(BaseViewSet):
         """Add an entry to a quarterly report."""
         report = self.get_object()
         
-        if not can_user_access_unit(request.user, report.unit):
+        if not can_user_access_unit(request.user, report.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if report.status != 'DRAFT':
@@ -190,7 +228,9 @@ class QuarterlyReportViewSet(BaseViewSet):
                     report.unit,
                     'CREATE',
                     context_report=report,
-                    message=f"Added entry for indicator {indicator.code}"
+                    message=f"Added entry for indicator {indicator.code}",
+                    entity=serializer.instance,
+                    changes=diff_fields({}, snapshot_fields(serializer.instance))
                 )
                 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -213,6 +253,7 @@ class QuarterlyReportViewSet(BaseViewSet):
             reason = serializer.validated_data.get('reason', '')
             
             approved_count = 0
+            approved_units, approved_years = set(), set()
             with transaction.atomic():
                 for report_id in report_ids:
                     try:
@@ -223,6 +264,8 @@ class QuarterlyReportViewSet(BaseViewSet):
                             report.approved_at = timezone.now()
                             report.save()
                             approved_count += 1
+                            approved_units.add(report.unit_id)
+                            approved_years.add(report.year)
 
                             self.log_action(
                                 report.unit,
@@ -232,6 +275,7 @@ class QuarterlyReportViewSet(BaseViewSet):
                             )
                     except QuarterlyReport.DoesNotExist:
                         continue
+                warm_stats_later(approved_units, approved_years)
             
             return Response({
                 'message': f'{approved_count} reports approved successfully',
@@ -241,7 +285,7 @@ class QuarterlyReportViewSet(BaseViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class QuarterlyIndicatorEntryViewSet(BaseViewSet):
+class QuarterlyIndicatorEntryViewSet(MessagePackMixin, BaseViewSet):
     """Quarterly indicator entry management API endpoints."""
     queryset = QuarterlyIndicatorEntry.objects.all()
     serializer_class = QuarterlyIndicatorEntrySerializer
@@ -251,19 +295,31 @@ class QuarterlyIndicatorEntryViewSet(BaseViewSet):
         profile = get_user_profile(self.request.user)
         report_id = self.request.query_params.get('report_id')
         
+        queryset = None
         if report_id:
             try:
                 report = QuarterlyReport.objects.get(id=report_id)
-                if can_user_access_unit(self.request.user, report.unit):
-                    return QuarterlyIndicatorEntry.objects.filter(report=report)
+                if can_user_access_unit(self.request.user, report.unit_id):
+                    queryset = QuarterlyIndicatorEntry.objects.filter(report=report)
             except QuarterlyReport.DoesNotExist:
                 pass
         
-        # Fallback to user's accessible reports
-        if profile.role == 'SUPERADMIN':
-            return QuarterlyIndicatorEntry.objects.all()
-        else:
-            return QuarterlyIndicatorEntry.objects.filter(report__unit=profile.unit)
+        if queryset is None:
+            # Fallback to user's accessible reports
+            if profile.role == 'SUPERADMIN':
+                queryset = QuarterlyIndicatorEntry.objects.all()
+            else:
+                queryset = QuarterlyIndicatorEntry.objects.filter(report__unit=profile.unit)
+        
+        queryset = self.select_rendered(
+            queryset,
+            indicator='indicator',
+            updated_by='updated_by'
+        )
+        if self.expands_field('indicator'):
+            # The nested indicator never renders its description
+            queryset = queryset.defer('indicator__description')
+        return self.defer_unrendered(queryset, 'remarks')
     
     def perform_create(self, serializer):
         """Create entry with validation."""
@@ -275,7 +331,7 @@ class QuarterlyIndicatorEntryViewSet(BaseViewSet):
         
         try:
             report = QuarterlyReport.objects.get(id=report_id)
-            if not can_user_access_unit(self.request.user, report.unit):
+            if not can_user_access_unit(self.request.user, report.unit_id):
                 raise PermissionDenied('Permission denied')
             
             if report.status != 'DRAFT':
@@ -287,7 +343,9 @@ class QuarterlyIndicatorEntryViewSet(BaseViewSet):
                 report.unit,
                 'CREATE',
                 context_report=report,
-                message=f"Added entry for indicator {serializer.instance.indicator.code}"
+                message=f"Added entry for indicator {serializer.instance.indicator.code}",
+                entity=serializer.instance,
+                changes=diff_fields({}, snapshot_fields(serializer.instance))
             )
             
         except QuarterlyReport.DoesNotExist:
@@ -300,26 +358,29 @@ class QuarterlyIndicatorEntryViewSet(BaseViewSet):
         entry = self.get_object()
         report = entry.report
         
-        if not can_user_access_unit(self.request.user, report.unit):
+        if not can_user_access_unit(self.request.user, report.unit_id):
             raise PermissionDenied('Permission denied')
         
         if report.status != 'DRAFT':
             raise ValidationError({'error': 'Cannot modify entries in submitted/approved reports'})
         
+        before = snapshot_fields(entry)
         serializer.save(updated_by=self.request.user)
 
         self.log_action(
             report.unit,
             'UPDATE',
             context_report=report,
-            message=f"Updated entry for indicator {entry.indicator.code}"
+            message=f"Updated entry for indicator {entry.indicator.code}",
+            entity=serializer.instance,
+            changes=diff_fields(before, snapshot_fields(serializer.instance))
         )
     
     def perform_destroy(self, instance):
         """Delete entry with validation."""
         report = instance.report
         
-        if not can_user_access_unit(self.request.user, report.unit):
+        if not can_user_access_unit(self.request.user, report.unit_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         if report.status != 'DRAFT':
@@ -329,7 +390,8 @@ class QuarterlyIndicatorEntryViewSet(BaseViewSet):
             report.unit,
             'UPDATE',
             context_report=report,
-            message=f"Deleted entry for indicator {instance.indicator.code}"
+            message=f"Deleted entry for indicator {instance.indicator.code}",
+            entity=instance
         )
 
         instance.delete()
\ No newline at end of file
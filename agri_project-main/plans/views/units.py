@@ -10,6 +10,7 @@ from django.contrib.auth.models import User
 
 from ..models import Unit, Indicator, AnnualPlan, QuarterlyReport, UserProfile, WorkflowAudit
 from ..serializers import UnitSerializer, IndicatorNestedSerializer, AnnualPlanListSerializer, QuarterlyReportListSerializer
+from ..stats import unit_statistics_summary
 from .base import BaseViewSet, can_user_access_unit, get_user_profile
 
 
@@ -27,14 +28,24 @@ class UnitViewSet(BaseViewSet):
             
         profile = get_user_profile(self.request.user)
         
+        queryset = Unit.objects.with_counts(
+            children=self.renders_field('children_count'),
+            users=self.renders_field('users_count'),
+            parent=self.renders_field('parent_name')
+        )
+        
         # Handle case where profile doesn't exist
         if not profile:
-            return Unit.objects.all()  # Allow viewing all units if no profile
+            return queryset  # Allow viewing all units if no profile
         
         if profile.role == 'SUPERADMIN':
-            return Unit.objects.all()
+            return queryset
         else:
-            return Unit.objects.filter(id=profile.unit.id)
+            return queryset.filter(id=profile.unit_id)
+    
+    def list(self, request, *args, **kwargs):
+        """List units from values() rows."""
+        return self.values_response(self.filter_queryset(self.get_queryset()))
     
     def perform_create(self, serializer):
         """Handle unit creation with validation."""
@@ -81,8 +92,8 @@ class UnitViewSet(BaseViewSet):
         
         # Get related data
         indicators = unit.indicators.filter(active=True)
-        annual_plans = unit.annual_plans.order_by('-year')[:5]
-        quarterly_reports = unit.quarterly_reports.order_by('-year', '-quarter')[:5]
+        annual_plans = unit.annual_plans.for_listing().order_by('-year')[:5]
+        quarterly_reports = unit.quarterly_reports.for_listing().order_by('-year', '-quarter')[:5]
         
         # Serialize the main unit
         unit_serializer = self.get_serializer(unit)
@@ -122,7 +133,7 @@ class UnitViewSet(BaseViewSet):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         year = request.query_params.get('year')
-        queryset = unit.annual_plans.all()
+        queryset = unit.annual_plans.for_listing()
         
         if year:
             queryset = queryset.filter(year=year)
@@ -142,7 +153,7 @@ class UnitViewSet(BaseViewSet):
         year = request.query_params.get('year')
         quarter = request.query_params.get('quarter')
         
-        queryset = unit.quarterly_reports.all()
+        queryset = unit.quarterly_reports.for_listing()
         
         if year:
             queryset = queryset.filter(year=year)
@@ -162,19 +173,8 @@ class UnitViewSet(BaseViewSet):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         from django.utils import timezone
-        current_year = timezone.now().year
-        
-        stats = {
-            'indicators_count': unit.indicators.filter(active=True).count(),
-            'annual_plans_count': unit.annual_plans.filter(year=current_year).count(),
-            'quarterly_reports_count': unit.quarterly_reports.filter(year=current_year).count(),
-            'pending_approvals': unit.annual_plans.filter(
-                year=current_year,
-                status='SUBMITTED'
-            ).count(),
-        }
         
-        return Response(stats)
+        return Response(unit_statistics_summary(unit, timezone.now().year))
     
     def destroy(self, request, *args, **kwargs):
         """Enhanced delete with dependency checking and cascade options."""
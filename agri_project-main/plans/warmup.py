@@ -0,0 +1,83 @@
+"""
+Cache warm-up of dashboard and unit statistics.
+
+Statistics are computed into the versioned cache (plans.cache) before anyone
+asks for them: for every unit by the warm_stats_cache command after a deploy
+or quarter close, and for the units concerned in a background thread pool
+after plans or reports are approved.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .cache import ALL_UNITS
+from .models import AnnualPlan, Unit
+from .stats import (
+    current_dashboard_stats, current_quarter, performance_summary, plan_progress_summary,
+    unit_performance_summary, unit_statistics_summary
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def warm_unit(unit, years):
+    """Compute the statistics of ``unit`` for ``years``."""
+    current_year, _ = current_quarter()
+    current_dashboard_stats(unit.id)
+    unit_statistics_summary(unit, current_year)
+    for year in years:
+        performance_summary(unit.id, year)
+        unit_performance_summary(unit, year)
+    for plan in AnnualPlan.objects.filter(unit=unit, year__in=years):
+        plan_progress_summary(plan)
+
+
+def warm_stats(units=None, years=()):
+    """Compute the statistics of ``units`` (default all) and of the all-units scope.
+
+    The current year is always included in ``years``. Returns the number of
+    units warmed.
+    """
+    years = sorted({current_quarter()[0], *years})
+    current_dashboard_stats(ALL_UNITS)
+    for year in years:
+        performance_summary(ALL_UNITS, year)
+
+    count = 0
+    for unit in (Unit.objects.all() if units is None else units):
+        warm_unit(unit, years)
+        count += 1
+    return count
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'STATS_WARMUP_WORKERS', 2),
+                thread_name_prefix='stats-warmup'
+            )
+        return _executor
+
+
+def _warm_in_background(unit_ids, years):
+    try:
+        warm_stats(Unit.objects.filter(id__in=unit_ids), years)
+    except Exception:
+        logger.exception('Warming the statistics of units %s failed', unit_ids)
+    finally:
+        # Pool threads are long-lived; do not keep their connections open
+        connections.close_all()
+
+
+def warm_stats_later(unit_ids, years=()):
+    """Warm the statistics of ``unit_ids`` in the background once the transaction commits."""
+    unit_ids, years = sorted(set(unit_ids)), sorted(set(years))
+    transaction.on_commit(lambda: _get_executor().submit(_warm_in_background, unit_ids, years))
@@ -1,9 +1,12 @@
-import { useQuery } from "@tanstack/react-query";
+import { useEffect, useState } from "react";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import {
   getDashboardStats,
   getPendingApprovals,
   getRecentActivities,
+  subscribeToActivities,
 } from "@/services/dashboard-service";
+import { WorkflowAuditEntry } from "@/services/types";
 import DashboardLayout from "@/components/layouts/DashboardLayout";
 import DashboardStats from "@/components/dashboard/DashboardStats";
 import PendingApprovals from "@/components/dashboard/PendingApprovals";
@@ -11,8 +14,14 @@ import RecentActivity from "@/components/dashboard/RecentActivity";
 import { Card, CardContent } from "@/components/ui/card";
 import { useAuthGuard } from "@/hooks/use-auth-guard";
 
+// Refresh interval of recent activity when the activity stream is unavailable
+const ACTIVITY_POLL_MS = 30000;
+
 const Dashboard = () => {
   const { session, checking } = useAuthGuard();
+  const queryClient = useQueryClient();
+  // False once the activity stream turns out to be unavailable
+  const [streaming, setStreaming] = useState(true);
 
   const statsQuery = useQuery({
     queryKey: ["dashboard", "stats"],
@@ -30,8 +39,24 @@ const Dashboard = () => {
     queryKey: ["dashboard", "recent-activities"],
     queryFn: getRecentActivities,
     enabled: !checking && !!session,
+    // Kept fresh by the activity stream below; polled when it is unavailable
+    staleTime: streaming ? Infinity : 0,
+    refetchInterval: streaming ? false : ACTIVITY_POLL_MS,
   });
 
+  useEffect(() => {
+    if (checking || !session) {
+      return;
+    }
+    return subscribeToActivities((entry) => {
+      queryClient.setQueryData<WorkflowAuditEntry[]>(
+        ["dashboard", "recent-activities"],
+        (previous = []) =>
+          [entry, ...previous.filter((item) => item.id !== entry.id)].slice(0, 10)
+      );
+    }, () => setStreaming(false));
+  }, [checking, session, queryClient]);
+
   if (checking) {
     return (
       <div className="min-h-screen flex items-center justify-center">
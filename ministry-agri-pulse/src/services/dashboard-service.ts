@@ -1,4 +1,4 @@
-import { apiClient } from "@/services/api-client";
+import { API_BASE_URL, apiClient } from "@/services/api-client";
 import {
   DashboardStats,
   PerformanceSummary,
@@ -22,6 +22,74 @@ export const getRecentActivities = async (): Promise<WorkflowAuditEntry[]> => {
     : [];
 };
 
+// Delay before reopening a dropped stream with a fresh ticket
+const STREAM_RECONNECT_MS = 3000;
+
+// EventSource cannot send an Authorization header, so each connection is
+// opened with a single-use ticket instead of the token. Calls onUnavailable
+// when the stream cannot be opened (e.g. the API is not served over ASGI);
+// callers then poll. Returns a function that closes the stream.
+export const subscribeToActivities = (
+  onActivity: (entry: WorkflowAuditEntry) => void,
+  onUnavailable: () => void
+): (() => void) => {
+  let source: EventSource | null = null;
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+  let lastEventId = "";
+
+  const connect = async () => {
+    let ticket: string;
+    try {
+      const { data } = await apiClient.post("/audit/stream/ticket/");
+      ticket = data.ticket;
+    } catch {
+      onUnavailable();
+      return;
+    }
+    if (closed) {
+      return;
+    }
+
+    const params = new URLSearchParams({ ticket });
+    if (lastEventId) {
+      params.set("last_event_id", lastEventId);
+    }
+    let opened = false;
+    source = new EventSource(`${API_BASE_URL}/audit/stream/?${params}`);
+
+    source.addEventListener("open", () => {
+      opened = true;
+    });
+    source.addEventListener("activity", (event) => {
+      const message = event as MessageEvent;
+      lastEventId = message.lastEventId || lastEventId;
+      onActivity(mapWorkflowAuditEntry(JSON.parse(message.data)));
+    });
+    source.addEventListener("error", () => {
+      // The ticket is used up, so reconnect with a new one rather than letting
+      // EventSource retry the same URL
+      source?.close();
+      if (closed) {
+        return;
+      }
+      if (!opened) {
+        onUnavailable();
+        return;
+      }
+      timer = setTimeout(connect, STREAM_RECONNECT_MS);
+    });
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    source?.close();
+  };
+};
+
 export const getPendingApprovals = async (): Promise<AnnualPlanSummary[]> => {
   const { data } = await apiClient.get("/dashboard/pending_approvals/");
   return Array.isArray(data)
@@ -30,10 +30,17 @@ export interface CreateAnnualPlanTargetData {
   remarks?: string;
 }
 
+// Columns read by mapAnnualPlanSummary; nested targets are not loaded
+const PLAN_SUMMARY_FIELDS =
+  "id,year,unit,status,created_by,submitted_at,approved_at,targets_count";
+
 export const getAnnualPlans = async (
   filters: AnnualPlanFilters = {}
 ): Promise<AnnualPlanSummary[]> => {
-  const params: Record<string, string | number> = {};
+  const params: Record<string, string | number> = {
+    fields: PLAN_SUMMARY_FIELDS,
+    expand: "unit,created_by",
+  };
   if (filters.year) params.year = filters.year;
   if (filters.unitId) params.unit = filters.unitId;
   if (filters.status) params.status = filters.status;
@@ -97,6 +97,8 @@ export interface WorkflowAuditEntry {
   unit: UnitSummary;
   contextPlan: AnnualPlanSummary | null;
   contextReport: QuarterlyReportSummary | null;
+  contextPlanId: number | null;
+  contextReportId: number | null;
 }
 
 const mapUnit = (payload: any): UnitSummary => ({
@@ -167,6 +169,9 @@ export const mapWorkflowAuditEntry = (payload: any): WorkflowAuditEntry => ({
   contextReport: payload?.context_report
     ? mapQuarterlyReportSummary(payload.context_report)
     : null,
+  contextPlanId: payload?.context_plan_id ?? payload?.context_plan?.id ?? null,
+  contextReportId:
+    payload?.context_report_id ?? payload?.context_report?.id ?? null,
 });
 
 export const mapDashboardStats = (payload: any): DashboardStats => ({